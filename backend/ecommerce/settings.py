@@ -1,5 +1,6 @@
 import os
 from decouple import config
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -100,6 +101,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # REST Framework
 REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'shop.authentication.FirebaseAuthentication',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
@@ -116,9 +120,30 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # Firebase Admin SDK
 GOOGLE_APPLICATION_CREDENTIALS = config('GOOGLE_APPLICATION_CREDENTIALS', default='')
+# Verified ID tokens are cached per process until their exp claim or this TTL (seconds)
+FIREBASE_TOKEN_CACHE_SIZE = config('FIREBASE_TOKEN_CACHE_SIZE', default=1024, cast=int)
+FIREBASE_TOKEN_CACHE_TTL = config('FIREBASE_TOKEN_CACHE_TTL', default=300, cast=int)
+
+# Caches. The catalog alias backs shop.catalog_cache; LocMemCache is per process, so
+# point it at a FileBasedCache directory or a shared cache server when running several
+# workers so that invalidations reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'catalog': {
+        'BACKEND': config('CATALOG_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CATALOG_CACHE_LOCATION', default='catalog'),
+    },
+}
+CATALOG_CACHE_ALIAS = 'catalog'
+# Seconds a cached catalog response is served as fresh, and how much longer it may be served stale while rebuilding
+CATALOG_CACHE_TTL = config('CATALOG_CACHE_TTL', default=300, cast=int)
+CATALOG_CACHE_STALE_TTL = config('CATALOG_CACHE_STALE_TTL', default=3600, cast=int)
 
 # Cloudinary settings
 CLOUDINARY_CLOUD_NAME = config('CLOUDINARY_CLOUD_NAME', default='')
@@ -127,6 +152,24 @@ CLOUDINARY_BASE_URL = config('CLOUDINARY_BASE_URL', default='https://res.cloudin
 # Email settings
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 CONTACT_RECEIVER_EMAIL = config('CONTACT_RECEIVER_EMAIL', default='info@arifbrand.com')
+# Outbound queue drained by `manage.py send_queued_emails`. Failed sends are retried after
+# EMAIL_QUEUE_RETRY_DELAY seconds, doubling up to EMAIL_QUEUE_MAX_RETRY_DELAY, and a claimed
+# batch is hidden from other workers for EMAIL_QUEUE_LEASE seconds.
+EMAIL_QUEUE_BATCH_SIZE = config('EMAIL_QUEUE_BATCH_SIZE', default=50, cast=int)
+EMAIL_QUEUE_MAX_ATTEMPTS = config('EMAIL_QUEUE_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_QUEUE_RETRY_DELAY = config('EMAIL_QUEUE_RETRY_DELAY', default=60, cast=int)
+EMAIL_QUEUE_MAX_RETRY_DELAY = config('EMAIL_QUEUE_MAX_RETRY_DELAY', default=3600, cast=int)
+EMAIL_QUEUE_LEASE = config('EMAIL_QUEUE_LEASE', default=300, cast=int)
+
+# Idempotency-Key handling for order and checkout requests: how long a stored response is
+# replayed, how long a duplicate waits for the first request to finish, and after how long
+# an unfinished first request is presumed dead and its key freed.
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=86400, cast=int)
+IDEMPOTENCY_WAIT_TIMEOUT = config('IDEMPOTENCY_WAIT_TIMEOUT', default=10, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=60, cast=int)
+
+# Seconds an unpaid order holds its stock before `manage.py release_expired_reservations` frees it
+STOCK_RESERVATION_TTL = config('STOCK_RESERVATION_TTL', default=900, cast=int)
 
 # Payment settings
 CBE_API_KEY = config('CBE_API_KEY', default='cbe_test_key_placeholder')
@@ -1,5 +1,7 @@
-from django.contrib import admin
-from .models import Category, Product, InventoryItem, StockMovement, Order, OrderItem
+from django.contrib import admin, messages
+from django.utils import timezone
+from .models import Category, Product, InventoryItem, StockMovement, StockReservation, Order, OrderItem, OutgoingEmail
+from .reservations import InsufficientStockError, StockChangedError, cancel_order, confirm_payment
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -19,6 +21,9 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     inlines = [InventoryItemInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_stock()
+    
     def stock(self, obj):
         return obj.stock
     stock.short_description = 'Current Stock'
@@ -36,6 +41,13 @@ class StockMovementAdmin(admin.ModelAdmin):
     search_fields = ('product__name', 'note')
     readonly_fields = ('created_at',)
 
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('inventory_item', 'order', 'quantity', 'expires_at')
+    list_filter = ('expires_at',)
+    search_fields = ('inventory_item__sku', 'order__email')
+    raw_id_fields = ('inventory_item', 'order')
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -43,7 +55,7 @@ class OrderItemInline(admin.TabularInline):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'email', 'total', 'status', 'payment_method', 'created_at')
+    list_display = ('id', 'email', 'total', 'status', 'stock_reserved', 'payment_method', 'created_at')
     list_filter = ('status', 'payment_method', 'created_at')
     search_fields = ('email', 'user_uid')
     readonly_fields = ('user_uid', 'created_at')
@@ -52,9 +64,28 @@ class OrderAdmin(admin.ModelAdmin):
     actions = ['mark_as_paid', 'mark_as_canceled']
     
     def mark_as_paid(self, request, queryset):
-        queryset.update(status='paid')
+        # Paying converts the order's stock reservations into a sale
+        for order_id in queryset.values_list('pk', flat=True):
+            try:
+                confirm_payment(order_id)
+            except (InsufficientStockError, StockChangedError):
+                self.message_user(request, f"Order #{order_id} is out of stock and was left pending", messages.ERROR)
     mark_as_paid.short_description = "Mark selected orders as paid"
     
     def mark_as_canceled(self, request, queryset):
-        queryset.update(status='canceled')
-    mark_as_canceled.short_description = "Mark selected orders as canceled"
\ No newline at end of file
+        for order_id in queryset.values_list('pk', flat=True):
+            cancel_order(order_id)
+    mark_as_canceled.short_description = "Mark selected orders as canceled"
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'to')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+    retry_now.short_description = "Retry selected emails now"
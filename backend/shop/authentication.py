@@ -0,0 +1,26 @@
+from rest_framework.authentication import BaseAuthentication
+
+
+class FirebaseUser(dict):
+    """The user FirebaseAuthMiddleware attaches to the request (uid, email)"""
+
+    @property
+    def is_authenticated(self):
+        return self.get('authenticated', False)
+
+    @property
+    def is_active(self):
+        return self.is_authenticated
+
+
+class FirebaseAuthentication(BaseAuthentication):
+    """Hand the user verified by FirebaseAuthMiddleware to DRF views"""
+
+    def authenticate(self, request):
+        user = getattr(request._request, 'user', None)
+        if isinstance(user, FirebaseUser) and user.is_authenticated:
+            return (user, None)
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer'
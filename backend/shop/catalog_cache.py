@@ -0,0 +1,111 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+
+from .models import Category
+
+CATEGORIES_KEY = 'catalog:categories'
+ALL_PRODUCTS = '*'
+
+
+def products_key(category_slug=None):
+    return f'catalog:products:{category_slug or ALL_PRODUCTS}'
+
+
+class CatalogCache:
+    """
+    Cached catalog payloads on a pluggable Django cache backend.
+
+    Each entry records the generation of its key when it was built, and
+    invalidating a key only replaces that generation. The old entry therefore
+    survives as a stale copy: the first request to notice takes a short lock
+    and rebuilds it while concurrent requests keep serving the stale payload,
+    so a change never sends every worker to the database at once.
+    """
+
+    def __init__(self, alias='catalog', ttl=300, stale_ttl=3600, lock_timeout=30, clock=time.time):
+        self.alias = alias
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.clock = clock
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_or_build(self, key, build):
+        """Return the payload cached under key, calling build() when it is missing or stale"""
+        generation_key = f'{key}:generation'
+        found = self.cache.get_many([key, generation_key])
+        entry = found.get(key)
+        generation = found.get(generation_key)
+        now = self.clock()
+
+        if entry is not None and entry['generation'] == generation and entry['fresh_until'] > now:
+            self.hits += 1
+            return entry['payload']
+
+        lock_key = f'{key}:lock'
+        if entry is not None and not self.cache.add(lock_key, True, self.lock_timeout):
+            # Another request is already rebuilding this entry
+            self.stale_hits += 1
+            return entry['payload']
+
+        self.misses += 1
+        try:
+            payload = build()
+            self.cache.set(
+                key,
+                {'generation': generation, 'fresh_until': now + self.ttl, 'payload': payload},
+                self.ttl + self.stale_ttl
+            )
+        finally:
+            if entry is not None:
+                self.cache.delete(lock_key)
+        return payload
+
+    def invalidate(self, keys):
+        """Mark the entries under keys stale"""
+        self.cache.set_many({f'{key}:generation': uuid.uuid4().hex for key in keys}, None)
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses}
+
+
+catalog_cache = CatalogCache(
+    alias=settings.CATALOG_CACHE_ALIAS,
+    ttl=settings.CATALOG_CACHE_TTL,
+    stale_ttl=settings.CATALOG_CACHE_STALE_TTL,
+)
+
+
+def invalidate_catalog(categories=False, category_ids=(), product_ids=(), slugs=()):
+    """
+    Mark the cached category list (when categories is set) and the product
+    lists affected by the given categories, products or slugs stale. The
+    unfiltered product list is always included.
+    """
+    keys = {products_key()}
+    if categories:
+        keys.add(CATEGORIES_KEY)
+    slugs = set(slugs)
+    if category_ids or product_ids:
+        slugs.update(
+            Category.objects.filter(Q(pk__in=category_ids) | Q(products__pk__in=product_ids))
+            .values_list('slug', flat=True).distinct()
+        )
+    keys.update(products_key(slug) for slug in slugs if slug)
+    catalog_cache.invalidate(keys)
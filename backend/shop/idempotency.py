@@ -0,0 +1,140 @@
+from datetime import timedelta
+from functools import wraps
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+# Replies that depend on the moment rather than on the request; a retry may well succeed
+TRANSIENT_STATUSES = {408, 409, 423, 425, 429}
+
+def retryable(response):
+    """Mark a client error reply as depending on current state, so it is never replayed"""
+    response.retryable = True
+    return response
+
+def is_final(response):
+    """Whether a response is the request's lasting outcome: a success or a deterministic 4xx"""
+    if getattr(response, 'retryable', False) or response.status_code in TRANSIENT_STATUSES:
+        return False
+    return 200 <= response.status_code < 500
+
+def request_hash(request):
+    """Fingerprint of what was asked, so a key can't be reused for a different request"""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{body}'.encode()).hexdigest()
+
+def claim(user_uid, key, fingerprint):
+    """
+    Return (record, created). created means this request owns the key and must
+    run the view; otherwise record is the existing one, or None if it went
+    away between our insert and read.
+    """
+    now = timezone.now()
+    # Expired keys, and keys whose owner died before finishing, are free again
+    IdempotencyKey.objects.filter(user_uid=user_uid, key=key).filter(
+        Q(expires_at__lte=now) | Q(
+            status_code__isnull=True,
+            created_at__lte=now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+        )
+    ).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user_uid=user_uid,
+                key=key,
+                request_hash=fingerprint,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+            )
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(user_uid=user_uid, key=key).first(), False
+
+def replay(record):
+    response = Response(record.response_data, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+def run_and_store(record, view, request, *args, **kwargs):
+    """
+    Run the view and store its response in one transaction, so the key can
+    never end up recorded without the order it created or the other way round.
+    Server errors and transient replies are not stored and free the key for
+    another try.
+    """
+    stored = False
+    try:
+        with transaction.atomic():
+            response = view(request, *args, **kwargs)
+            if not is_final(response):
+                transaction.set_rollback(True)
+            else:
+                IdempotencyKey.objects.filter(pk=record.pk).update(
+                    status_code=response.status_code,
+                    # Round-trip through DRF's encoder so a replay renders exactly like the original
+                    response_data=json.loads(json.dumps(response.data, cls=JSONEncoder)),
+                )
+                stored = True
+    finally:
+        if not stored:
+            record.delete()
+    return response
+
+def idempotent(view):
+    """
+    Make a POST view safe to retry with an Idempotency-Key header.
+
+    The first request with a key runs the view and its response is stored
+    for IDEMPOTENCY_KEY_TTL seconds per (user, key). Later requests with the
+    same key get that response replayed without running the view again. A
+    duplicate that arrives while the first is still running waits for it, for
+    up to IDEMPOTENCY_WAIT_TIMEOUT seconds, instead of racing it.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user_uid = request.user['uid']
+        fingerprint = request_hash(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        delay = 0.05
+        while True:
+            record, created = claim(user_uid, key, fingerprint)
+            if created:
+                return run_and_store(record, view, request, *args, **kwargs)
+            if record is not None:
+                if record.request_hash != fingerprint:
+                    return Response(
+                        {'error': f'{HEADER} was already used for a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if record.status_code is not None:
+                    return replay(record)
+            if time.monotonic() >= deadline:
+                return Response(
+                    {'error': f'A request with this {HEADER} is still being processed'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    return wrapper
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+def enqueue_email(subject, message, from_email, recipient_list, reply_to=None):
+    """Queued counterpart of send_mail(); nothing talks to the mail server here"""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or '',
+        to=list(recipient_list),
+        reply_to=list(reply_to or []),
+    )
+
+def retry_delay(attempts):
+    """Seconds to wait after the given number of failed attempts, doubling each time"""
+    delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    return min(delay, settings.EMAIL_QUEUE_MAX_RETRY_DELAY)
+
+def claim_batch(batch_size):
+    """
+    Take up to batch_size due messages. Moving their next attempt past the
+    lease hides them from other workers, and if this worker dies mid-batch
+    they simply become due again once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(pk__in=[message.pk for message in batch]).update(
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE)
+        )
+    return batch
+
+def build_message(message, connection):
+    return EmailMessage(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or None,
+        to=message.to,
+        reply_to=message.reply_to,
+        connection=connection,
+    )
+
+def send_queued_emails(batch_size=None):
+    """
+    Send one batch of due messages over a single mail server connection and
+    record the outcome of each. Returns (sent, failed) counts.
+
+    Messages are handed to send_messages one at a time on the open connection
+    so that a rejected recipient only fails its own message. Failures are
+    retried with exponential backoff until EMAIL_QUEUE_MAX_ATTEMPTS.
+    """
+    batch = claim_batch(batch_size or settings.EMAIL_QUEUE_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    sent = []
+    errors = {}
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for message in batch:
+                try:
+                    connection.send_messages([build_message(message, connection)])
+                except Exception as e:
+                    errors[message.pk] = e
+                else:
+                    sent.append(message)
+    except Exception as e:
+        # The connection could not be opened, so nothing that wasn't sent got a try
+        sent_ids = {message.pk for message in sent}
+        for message in batch:
+            if message.pk not in sent_ids:
+                errors.setdefault(message.pk, e)
+
+    now = timezone.now()
+    for message in sent:
+        message.status = 'sent'
+        message.attempts += 1
+        message.sent_at = now
+        message.last_error = ''
+    failed = [message for message in batch if message.pk in errors]
+    for message in failed:
+        message.attempts += 1
+        message.last_error = f'{type(errors[message.pk]).__name__}: {errors[message.pk]}'
+        if message.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+            message.status = 'failed'
+        else:
+            message.next_attempt_at = now + timedelta(seconds=retry_delay(message.attempts))
+    OutgoingEmail.objects.bulk_update(
+        sent + failed, ['status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error']
+    )
+    return len(sent), len(failed)
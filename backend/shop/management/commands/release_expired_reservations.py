@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shop.reservations import release_expired_reservations
+
+class Command(BaseCommand):
+    help = 'Release the stock held by expired order reservations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Reservations deleted per statement')
+        parser.add_argument('--loop', action='store_true', help='Keep running, sweeping every --interval seconds')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_reservations(options['batch_size'])
+            if released:
+                self.stdout.write(f'Released {released} expired reservations')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
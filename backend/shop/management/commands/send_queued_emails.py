@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from shop.mail_queue import send_queued_emails
+
+class Command(BaseCommand):
+    help = 'Send the messages waiting in the outbound email queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.EMAIL_QUEUE_BATCH_SIZE,
+                            help='Messages sent over one mail server connection')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep running, polling the queue when it is empty')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds between polls of an empty queue with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}')
+            # A full batch means more may be waiting, so only sleep once the queue drains
+            if sent + failed < options['batch_size']:
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 import json
 
@@ -7,6 +10,7 @@ class Category(models.Model):
     slug = models.SlugField(unique=True)
     image_url = models.URLField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -15,6 +19,15 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class ProductQuerySet(models.QuerySet):
+    def with_stock(self):
+        """Annotate stock_total so Product.stock needs no extra queries"""
+        return self.annotate(
+            stock_total=Coalesce(Sum('inventory_items__stock'), 0) - Coalesce(
+                Subquery(StockReservation.objects.held_for_products(OuterRef('pk'))), 0
+            )
+        )
+
 class Product(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='products')
     name = models.CharField(max_length=200)
@@ -25,9 +38,15 @@ class Product(models.Model):
     sizes = models.JSONField(default=list, help_text="Available sizes as JSON array")
     active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProductQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['active', 'category'], name='product_active_category_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -35,8 +54,14 @@ class Product(models.Model):
     @property
     def stock(self):
         """Calculate total stock from inventory items"""
-        inventory_items = self.inventory_items.all()
-        return sum(item.stock for item in inventory_items) if inventory_items.exists() else 0
+        # Catalog querysets annotate this via Product.objects.with_stock()
+        if hasattr(self, 'stock_total'):
+            return self.stock_total
+        on_hand = self.inventory_items.aggregate(total=Sum('stock'))['total'] or 0
+        held = StockReservation.objects.active().filter(
+            inventory_item__product=self
+        ).aggregate(total=Sum('quantity'))['total'] or 0
+        return on_hand - held
 
 class InventoryItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inventory_items')
@@ -64,6 +89,9 @@ class StockMovement(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['product', '-created_at'], name='stock_move_product_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.change} ({self.reason})"
@@ -82,10 +110,15 @@ class Order(models.Model):
     payment_ref = models.CharField(max_length=200, blank=True, null=True)
     shipping_info = models.JSONField(default=dict)
     payment_method = models.CharField(max_length=20, default='cbe')
+    # True while the order's stock is only held by reservations, until payment turns it into a sale
+    stock_reserved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user_uid', '-created_at'], name='order_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.email}"
@@ -102,4 +135,94 @@ class OrderItem(models.Model):
 
     @property
     def subtotal(self):
-        return self.price * self.quantity
\ No newline at end of file
+        return self.price * self.quantity
+
+class StockReservationQuerySet(models.QuerySet):
+    def active(self, now=None):
+        return self.filter(expires_at__gt=now or timezone.now())
+
+    def held_for_products(self, product):
+        """Subquery body: quantity held by active reservations on product's inventory rows"""
+        return self.active().filter(inventory_item__product=product).values(
+            'inventory_item__product'
+        ).annotate(total=Sum('quantity')).values('total')
+
+    def held_for_items(self, inventory_item, exclude_order=None, now=None):
+        """Subquery body: quantity held by active reservations on inventory_item"""
+        queryset = self.active(now).filter(inventory_item=inventory_item)
+        if exclude_order is not None:
+            queryset = queryset.exclude(order=exclude_order)
+        return queryset.values('inventory_item').annotate(total=Sum('quantity')).values('total')
+
+class StockReservation(models.Model):
+    """
+    Stock held for an unpaid order until expires_at. Available stock is the
+    inventory row's stock minus its active holds; see shop.reservations.
+    """
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='reservations')
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    objects = StockReservationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Covers summing the active holds of a row, and the sweeper's range scan
+            models.Index(fields=['inventory_item', 'expires_at', 'quantity'], name='reservation_item_expiry_idx'),
+            models.Index(fields=['expires_at'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory_item} x {self.quantity} until {self.expires_at}"
+
+class OutgoingEmail(models.Model):
+    """An email waiting in the outbound queue; see shop.mail_queue"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list, help_text="Recipient addresses as JSON array")
+    reply_to = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outgoing_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+class IdempotencyKey(models.Model):
+    """The stored outcome of a request sent with an Idempotency-Key header; see shop.idempotency"""
+    user_uid = models.CharField(max_length=128, help_text="Firebase UID")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    # Both stay null while the first request is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_uid', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_uid}: {self.key}"
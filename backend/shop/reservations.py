@@ -0,0 +1,164 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .catalog_cache import invalidate_catalog
+from .models import InventoryItem, Order, StockMovement, StockReservation
+
+class StockChangedError(Exception):
+    """Raised inside an order transaction when stock moved after it was validated"""
+
+class InsufficientStockError(Exception):
+    """Raised when a product doesn't have enough available stock for the quantity asked for"""
+
+    def __init__(self, product_id):
+        super().__init__(product_id)
+        self.product_id = product_id
+
+def held_quantities(inventory_item_ids, exclude_order=None, now=None):
+    """Quantity held by active reservations, per inventory row"""
+    queryset = StockReservation.objects.active(now).filter(inventory_item_id__in=inventory_item_ids)
+    if exclude_order is not None:
+        queryset = queryset.exclude(order=exclude_order)
+    return dict(
+        queryset.values('inventory_item').annotate(total=Sum('quantity')).values_list('inventory_item', 'total')
+    )
+
+def allocate(requested, inventory_items, exclude_order=None, now=None):
+    """
+    Spread each product's requested quantity over the available stock of its
+    inventory rows. Returns {inventory_item_pk: quantity}.
+    """
+    held = held_quantities([item.pk for item in inventory_items], exclude_order, now)
+    rows_by_product = defaultdict(list)
+    for inventory_item in inventory_items:
+        rows_by_product[inventory_item.product_id].append(inventory_item)
+
+    allocations = {}
+    for product_id, quantity in requested.items():
+        remaining = quantity
+        for inventory_item in rows_by_product[product_id]:
+            take = min(max(inventory_item.stock - held.get(inventory_item.pk, 0), 0), remaining)
+            if take:
+                allocations[inventory_item.pk] = take
+                remaining -= take
+        if remaining:
+            raise InsufficientStockError(product_id)
+    return allocations
+
+def available_guard(allocations, exclude_order=None, now=None):
+    """
+    Q matching each allocated inventory row only while its stock still covers
+    the allocation on top of every other active hold, so an UPDATE filtered on
+    it touches fewer rows than allocated when stock moved meanwhile.
+    """
+    held = Coalesce(
+        Subquery(StockReservation.objects.held_for_items(OuterRef('pk'), exclude_order, now)), 0
+    )
+    guard = Q()
+    for pk, take in allocations.items():
+        guard |= Q(pk=pk, stock__gte=held + take)
+    return guard
+
+def hold(order, allocations, now=None):
+    """Reserve the allocated stock for order for STOCK_RESERVATION_TTL seconds"""
+    expires_at = (now or timezone.now()) + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+    StockReservation.objects.bulk_create([
+        StockReservation(order=order, inventory_item_id=pk, quantity=quantity, expires_at=expires_at)
+        for pk, quantity in allocations.items()
+    ])
+
+def confirm_payment(order_id, payment_ref=None):
+    """
+    Turn a paid order's reserved stock into a sale. Every inventory row is
+    decremented by one conditional UPDATE. If the holds expired in the meantime,
+    the stock is taken from whatever is still available.
+
+    Raises InsufficientStockError or StockChangedError when that stock is gone.
+    In that case the order stays pending.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order_id)
+        if order.status != 'pending':
+            return order
+        if order.stock_reserved:
+            lines = list(order.items.values_list('product_id', 'quantity'))
+            requested = defaultdict(int)
+            for product_id, quantity in lines:
+                requested[product_id] += quantity
+
+            allocations = dict(order.reservations.values_list('inventory_item_id', 'quantity'))
+            if not allocations:
+                # The sweeper already released the holds
+                inventory_items = list(
+                    InventoryItem.objects.select_for_update()
+                    .filter(product_id__in=requested)
+                    .order_by('pk')
+                )
+                allocations = allocate(requested, inventory_items, exclude_order=order, now=now)
+
+            updated = InventoryItem.objects.filter(available_guard(allocations, order, now)).update(
+                stock=Case(*[When(pk=pk, then=F('stock') - take) for pk, take in allocations.items()]),
+                updated_at=now
+            )
+            if updated != len(allocations):
+                raise StockChangedError()
+            order.reservations.all().delete()
+            StockMovement.objects.bulk_create([
+                StockMovement(product_id=product_id, change=-quantity, reason='sale', note=f'Order #{order.id}')
+                for product_id, quantity in lines
+            ])
+            product_ids = list(requested)
+            transaction.on_commit(lambda: invalidate_catalog(product_ids=product_ids))
+
+        order.status = 'paid'
+        order.stock_reserved = False
+        if payment_ref:
+            order.payment_ref = payment_ref
+        order.save(update_fields=['status', 'stock_reserved', 'payment_ref'])
+    return order
+
+def cancel_order(order_id):
+    """Cancel an unpaid order, releasing any stock it still holds"""
+    with transaction.atomic():
+        order = Order.objects.select_for_update().get(pk=order_id)
+        if order.status == 'paid':
+            return order
+        product_ids = list(order.reservations.values_list('inventory_item__product_id', flat=True).distinct())
+        if product_ids:
+            order.reservations.all().delete()
+            InventoryItem.objects.filter(product_id__in=product_ids).update(updated_at=timezone.now())
+            transaction.on_commit(lambda: invalidate_catalog(product_ids=product_ids))
+        order.status = 'canceled'
+        order.stock_reserved = False
+        order.save(update_fields=['status', 'stock_reserved'])
+    return order
+
+def release_expired_reservations(batch_size=1000):
+    """
+    Delete expired holds in batches. Each batch is one range scan on the expiry
+    index and one DELETE. Returns the number of holds released.
+    """
+    now = timezone.now()
+    released = 0
+    while True:
+        batch = list(
+            StockReservation.objects.filter(expires_at__lte=now)
+            .values_list('pk', 'inventory_item_id')[:batch_size]
+        )
+        if not batch:
+            return released
+        with transaction.atomic():
+            StockReservation.objects.filter(pk__in=[pk for pk, _ in batch]).delete()
+            inventory_items = InventoryItem.objects.filter(pk__in={item_id for _, item_id in batch})
+            # Touching the rows moves the catalog's Last-Modified/ETag along with the stock
+            inventory_items.update(updated_at=now)
+            product_ids = list(inventory_items.values_list('product_id', flat=True).distinct())
+            transaction.on_commit(lambda product_ids=product_ids: invalidate_catalog(product_ids=product_ids))
+        released += len(batch)
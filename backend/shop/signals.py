@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .catalog_cache import invalidate_catalog
+from .models import Category, Product, InventoryItem
+
+# Invalidation waits for the commit so a concurrent rebuild can't cache the old rows again
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, **kwargs):
+    instance._previous_slug = (
+        Category.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+        if instance.pk else None
+    )
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_previous_slug', None)}
+    transaction.on_commit(lambda: invalidate_catalog(categories=True, slugs=slugs))
+
+@receiver(pre_save, sender=Product)
+def remember_product_category(sender, instance, **kwargs):
+    instance._previous_category_id = (
+        Product.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        if instance.pk else None
+    )
+
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, **kwargs):
+    category_ids = {instance.category_id, getattr(instance, '_previous_category_id', None)} - {None}
+    transaction.on_commit(lambda: invalidate_catalog(category_ids=category_ids))
+
+@receiver([post_save, post_delete], sender=InventoryItem)
+def inventory_changed(sender, instance, **kwargs):
+    product_ids = [instance.product_id]
+    transaction.on_commit(lambda: invalidate_catalog(product_ids=product_ids))
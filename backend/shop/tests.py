@@ -0,0 +1,295 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import caches
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from .authentication import FirebaseUser
+from .mail_queue import enqueue_email, send_queued_emails
+from .middleware import FirebaseAuthMiddleware, token_cache
+from .models import Category, IdempotencyKey, InventoryItem, Order, OutgoingEmail, Product
+from .token_cache import VerifiedTokenCache
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    CONTACT_RECEIVER_EMAIL='shop@example.com',
+    EMAIL_QUEUE_MAX_ATTEMPTS=3,
+    EMAIL_QUEUE_RETRY_DELAY=60,
+    EMAIL_QUEUE_MAX_RETRY_DELAY=3600,
+)
+class EmailQueueTests(TestCase):
+    def test_contact_submit_queues_without_sending(self):
+        response = APIClient().post('/api/contact/', {
+            'name': 'Abebe', 'email': 'abebe@example.com', 'message': 'Do you ship to Adama?'
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        message = OutgoingEmail.objects.get()
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.to, ['shop@example.com'])
+        self.assertEqual(message.from_email, 'abebe@example.com')
+        self.assertIn('Do you ship to Adama?', message.body)
+
+    def test_worker_sends_and_marks_sent(self):
+        message = enqueue_email('Hello', 'Body', 'from@example.com', ['to@example.com'])
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Hello')
+        self.assertEqual(mail.outbox[0].to, ['to@example.com'])
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'sent')
+        self.assertEqual(message.attempts, 1)
+        self.assertIsNotNone(message.sent_at)
+        # Nothing is left to send
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test_failing_connection_reschedules_with_backoff(self):
+        message = enqueue_email('Hello', 'Body', 'from@example.com', ['to@example.com'])
+
+        with mock.patch.object(EmailBackend, 'open', side_effect=ConnectionRefusedError('mail server down')):
+            started = timezone.now()
+            self.assertEqual(send_queued_emails(), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.status, 'pending')
+            self.assertEqual(message.attempts, 1)
+            self.assertIn('mail server down', message.last_error)
+            self.assertGreaterEqual(message.next_attempt_at, started + timedelta(seconds=60))
+            self.assertLess(message.next_attempt_at, started + timedelta(seconds=120))
+
+            # Not due again until the backoff has passed
+            self.assertEqual(send_queued_emails(), (0, 0))
+
+            OutgoingEmail.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+            started = timezone.now()
+            self.assertEqual(send_queued_emails(), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.attempts, 2)
+            # The delay doubles after every failed attempt
+            self.assertGreaterEqual(message.next_attempt_at, started + timedelta(seconds=120))
+
+            OutgoingEmail.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(send_queued_emails(), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.status, 'failed')
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        caches[settings.CATALOG_CACHE_ALIAS].clear()
+        self.addCleanup(caches[settings.CATALOG_CACHE_ALIAS].clear)
+        category = Category.objects.create(name='Bags', slug='bags', image_url='https://example.com/bags.jpg')
+        self.products = [
+            Product.objects.create(
+                category=category, name=f'Tote {i}', slug=f'tote-{i}', description='Canvas tote',
+                price='250.00', image_url='https://example.com/tote.jpg'
+            )
+            for i in range(2)
+        ]
+
+    def test_unchanged_product_list_is_not_modified(self):
+        first = self.client.get('/api/products/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Last-Modified', first)
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+    def test_deleting_an_older_product_changes_the_etag(self):
+        first = self.client.get('/api/products/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].delete()
+
+        response = self.client.get('/api/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['slug'] for product in response.json()], ['tote-1'])
+
+    def test_missing_product_is_not_found_without_validators(self):
+        response = self.client.get('/api/products/999999/')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
+
+    def test_inactive_product_is_never_not_modified(self):
+        product = self.products[0]
+        first = self.client.get(f'/api/products/{product.pk}/')
+        self.assertEqual(first.status_code, 200)
+
+        Product.objects.filter(pk=product.pk).update(active=False)
+
+        for headers in ({}, {'HTTP_IF_NONE_MATCH': first['ETag']}, {'HTTP_IF_NONE_MATCH': '*'}):
+            response = self.client.get(f'/api/products/{product.pk}/', **headers)
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn('ETag', response)
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Bags', slug='bags', image_url='https://example.com/bags.jpg')
+        self.product = Product.objects.create(
+            category=category, name='Tote', slug='tote', description='Canvas tote',
+            price='250.00', image_url='https://example.com/tote.jpg'
+        )
+        self.inventory_item = InventoryItem.objects.create(product=self.product, sku='TOTE-1', stock=1)
+        self.client = APIClient()
+        self.client.force_authenticate(FirebaseUser(uid='uid-1', email='buyer@example.com', authenticated=True))
+
+    def order(self, quantity=1, key='key-1'):
+        return self.client.post('/api/orders/', {
+            'items': [{'product_id': self.product.pk, 'quantity': quantity}],
+            'shipping_info': {'city': 'Addis Ababa'},
+            'payment_method': 'cbe',
+        }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_created_order(self):
+        first = self.order()
+        second = self.order()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_validation_error_is_replayed(self):
+        first = self.order(quantity=0)
+        with mock.patch('shop.views.place_order') as place_order:
+            second = self.order(quantity=0)
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        place_order.assert_not_called()
+
+    def test_conflict_is_not_stored(self):
+        conflict = Response({'error': 'Stock changed while placing the order, please try again'}, status=409)
+        with mock.patch('shop.views.place_order', return_value=conflict):
+            self.assertEqual(self.order().status_code, 409)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        retry = self.order()
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', retry)
+
+    def test_insufficient_stock_is_not_stored(self):
+        self.assertEqual(self.order(quantity=2).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        InventoryItem.objects.filter(pk=self.inventory_item.pk).update(stock=5)
+        retry = self.order(quantity=2)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class VerifiedTokenCacheTests(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = VerifiedTokenCache(max_size=2, ttl=300, clock=self.clock)
+
+    def test_entry_expires_at_ttl(self):
+        self.cache.set('token-1', {'uid': 'uid-1', 'exp': self.clock.now + 3600})
+
+        self.clock.now += 299
+        self.assertEqual(self.cache.get('token-1'), {'uid': 'uid-1', 'exp': 4600.0})
+        self.clock.now += 1
+        self.assertIsNone(self.cache.get('token-1'))
+
+    def test_entry_expires_at_exp_before_ttl(self):
+        self.cache.set('token-1', {'uid': 'uid-1', 'exp': self.clock.now + 60})
+
+        self.clock.now += 59
+        self.assertIn('token-1', self.cache)
+        self.clock.now += 1
+        self.assertNotIn('token-1', self.cache)
+        self.assertIsNone(self.cache.get('token-1'))
+
+    def test_expired_token_is_not_stored(self):
+        self.cache.set('token-1', {'uid': 'uid-1', 'exp': self.clock.now})
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_max_size_evicts_least_recently_used(self):
+        self.cache.set('token-1', {'uid': 'uid-1'})
+        self.cache.set('token-2', {'uid': 'uid-2'})
+        self.cache.set('token-3', {'uid': 'uid-3'})
+
+        self.assertNotIn('token-1', self.cache)
+        self.assertIn('token-2', self.cache)
+        self.assertIn('token-3', self.cache)
+
+        # A hit makes token-2 the newest, so token-3 goes next
+        self.cache.get('token-2')
+        self.cache.set('token-4', {'uid': 'uid-4'})
+        self.assertIn('token-2', self.cache)
+        self.assertNotIn('token-3', self.cache)
+        self.assertIn('token-4', self.cache)
+
+    def test_stats_count_hits_and_misses(self):
+        verifier = mock.Mock(return_value={'uid': 'uid-1'})
+
+        self.cache.verify('token-1', verifier)
+        self.cache.verify('token-1', verifier)
+        self.cache.verify('token-1', verifier)
+        self.cache.verify('token-2', verifier)
+
+        self.assertEqual(self.cache.stats(), {'size': 2, 'hits': 2, 'misses': 2})
+        self.assertEqual(verifier.call_count, 2)
+
+        self.clock.now += 300
+        self.cache.verify('token-1', verifier)
+        self.assertEqual(self.cache.stats(), {'size': 2, 'hits': 2, 'misses': 3})
+
+class FirebaseAuthMiddlewareTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        patcher = mock.patch.object(
+            FirebaseAuthMiddleware, 'verify_id_token',
+            return_value={'uid': 'uid-1', 'email': 'buyer@example.com'}
+        )
+        self.verify_id_token = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_repeat_request_verifies_once(self):
+        for _ in range(3):
+            response = self.client.get('/api/orders/', headers={'Authorization': 'Bearer token-1'})
+            self.assertNotEqual(response.status_code, 401)
+
+        self.verify_id_token.assert_called_once_with('token-1')
+        self.assertEqual(token_cache.stats()['hits'], 2)
+
+    async def test_repeat_async_request_verifies_once(self):
+        for _ in range(3):
+            response = await self.async_client.get('/api/orders/', headers={'Authorization': 'Bearer token-1'})
+            self.assertNotEqual(response.status_code, 401)
+
+        self.verify_id_token.assert_called_once_with('token-1')
+
+    def test_each_token_is_verified(self):
+        self.client.get('/api/orders/', headers={'Authorization': 'Bearer token-1'})
+        self.client.get('/api/orders/', headers={'Authorization': 'Bearer token-2'})
+
+        self.assertEqual(self.verify_id_token.call_args_list, [mock.call('token-1'), mock.call('token-2')])
+
+    def test_rejected_token_is_not_cached(self):
+        self.verify_id_token.side_effect = ValueError('bad token')
+
+        for _ in range(2):
+            response = self.client.get('/api/orders/', headers={'Authorization': 'Bearer token-1'})
+            self.assertEqual(response.status_code, 401)
+
+        self.assertEqual(self.verify_id_token.call_count, 2)
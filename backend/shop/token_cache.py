@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedTokenCache:
+    """
+    Bounded, thread-safe LRU cache of decoded ID tokens.
+
+    Entries are keyed by a SHA-256 of the token, so raw tokens are never kept
+    in memory, and expire at the token's own exp claim or after ttl seconds,
+    whichever comes first.
+    """
+
+    def __init__(self, max_size=1024, ttl=300, clock=time.time):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        key = self._key(token)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token, decoded_token):
+        if self.max_size <= 0:
+            return
+        now = self.clock()
+        expires_at = now + self.ttl
+        if 'exp' in decoded_token:
+            expires_at = min(expires_at, decoded_token['exp'])
+        if expires_at <= now:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, decoded_token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > self.clock()
+
+    def verify(self, token, verifier):
+        """Return the decoded token, calling verifier(token) only on a cache miss"""
+        decoded_token = self.get(token)
+        if decoded_token is None:
+            decoded_token = verifier(token)
+            self.set(token, decoded_token)
+        return decoded_token
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses}
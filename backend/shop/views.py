@@ -1,26 +1,72 @@
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Count, Max, Prefetch
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from collections import defaultdict
 from decimal import Decimal
+import hashlib
 import json
 
-from .models import Category, Product, Order, OrderItem, InventoryItem, StockMovement
+from .catalog_cache import CATEGORIES_KEY, catalog_cache, invalidate_catalog, products_key
+from .idempotency import idempotent, retryable
+from .mail_queue import enqueue_email
+from .models import Category, Product, Order, OrderItem, InventoryItem
+from .reservations import InsufficientStockError, StockChangedError, allocate, available_guard, hold
 from .serializers import (
     CategorySerializer, ProductSerializer, OrderSerializer, 
     CreateOrderSerializer, InventoryItemSerializer, ContactSerializer
 )
 
+def conditional_get(request, state, render):
+    """
+    Answer a conditional GET with 304 when the catalog state still matches,
+    otherwise build the response with render(). Either way it carries an
+    ETag derived from state.
+
+    There is no Last-Modified: the newest updated_at doesn't move when a row
+    is deleted, but the row counts in state (and so the ETag) do.
+    """
+    fingerprint = '|'.join([request.get_full_path()] + [
+        f'{name}={value.isoformat() if hasattr(value, "isoformat") else value}'
+        for name, value in sorted(state.items())
+    ])
+    etag = 'W/"%s"' % hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest()
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render()
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+def product_state(queryset):
+    """One aggregate covering the products and the inventory rows their stock comes from"""
+    return queryset.aggregate(
+        products=Count('id', distinct=True),
+        products_updated=Max('updated_at'),
+        inventory_rows=Count('inventory_items'),
+        inventory_updated=Max('inventory_items__updated_at'),
+    )
+
 @api_view(['GET'])
 def category_list(request):
     """List all categories"""
-    categories = Category.objects.all()
-    serializer = CategorySerializer(categories, many=True)
-    return Response(serializer.data)
+    def build():
+        categories = Category.objects.all()
+        return {
+            'state': categories.aggregate(categories=Count('id'), updated=Max('updated_at')),
+            'data': list(CategorySerializer(categories, many=True).data),
+        }
+
+    cached = catalog_cache.get_or_build(CATEGORIES_KEY, build)
+    return conditional_get(request, cached['state'], lambda: Response(cached['data']))
 
 @api_view(['GET'])
 def product_list(request):
@@ -31,16 +77,31 @@ def product_list(request):
     
     if category_slug:
         queryset = queryset.filter(category__slug=category_slug)
-    
-    serializer = ProductSerializer(queryset, many=True)
-    return Response(serializer.data)
+
+    def build():
+        return {
+            'state': product_state(queryset),
+            'data': list(ProductSerializer(queryset.with_stock(), many=True).data),
+        }
+
+    cached = catalog_cache.get_or_build(products_key(category_slug), build)
+    return conditional_get(request, cached['state'], lambda: Response(cached['data']))
 
 @api_view(['GET'])
 def product_detail(request, pk):
     """Get product details"""
-    product = get_object_or_404(Product, pk=pk, active=True)
-    serializer = ProductSerializer(product)
-    return Response(serializer.data)
+    queryset = Product.objects.filter(pk=pk, active=True)
+    state = product_state(queryset)
+    # A missing or inactive product gets no validators, so it can never be answered with 304
+    if not state['products']:
+        raise Http404
+
+    def render():
+        product = get_object_or_404(queryset.with_stock())
+        serializer = ProductSerializer(product)
+        return Response(serializer.data)
+
+    return conditional_get(request, state, render)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -52,95 +113,141 @@ def inventory_list(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def create_order(request):
     """Create a new order"""
     serializer = CreateOrderSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    data = serializer.validated_data
-    
+    return place_order(request.user, serializer.validated_data)
+
+def place_order(user, data):
+    """
+    Create an order and reserve its stock in a constant number of queries,
+    however many lines the cart has. The stock is held for
+    STOCK_RESERVATION_TTL seconds and only taken once payment is confirmed.
+    """
+    try:
+        lines = [
+            (int(item['product_id']), int(item['quantity']), item.get('size', ''))
+            for item in data['items']
+        ]
+    except (KeyError, ValueError):
+        return Response(
+            {'error': 'Each item needs an integer product_id and quantity'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not lines or any(quantity <= 0 for _, quantity, _ in lines):
+        return Response(
+            {'error': 'Order must contain items with a positive quantity'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    requested = defaultdict(int)
+    for product_id, quantity, _ in lines:
+        requested[product_id] += quantity
+
     try:
         with transaction.atomic():
-            # Calculate total
-            total = Decimal('0.00')
-            order_items_data = []
-            
-            for item_data in data['items']:
-                product = get_object_or_404(Product, id=item_data['product_id'])
-                quantity = int(item_data['quantity'])
-                
-                # Check stock
-                if product.stock < quantity:
+            now = timezone.now()
+            # Lock every inventory row in primary key order so concurrent orders can't deadlock
+            inventory_items = list(
+                InventoryItem.objects.select_for_update(of=('self',))
+                .select_related('product')
+                .filter(product_id__in=requested)
+                .order_by('pk')
+            )
+            products = {}
+            for inventory_item in inventory_items:
+                products[inventory_item.product_id] = inventory_item.product
+
+            missing = requested.keys() - products.keys()
+            if missing:
+                # Products without inventory rows exist but have no stock
+                products.update(Product.objects.in_bulk(missing))
+                unknown = missing - products.keys()
+                if unknown:
                     return Response(
-                        {'error': f'Insufficient stock for {product.name}'},
-                        status=status.HTTP_400_BAD_REQUEST
+                        {'error': f'Product {min(unknown)} not found'},
+                        status=status.HTTP_404_NOT_FOUND
                     )
-                
-                price = Decimal(str(product.price))
-                subtotal = price * quantity
-                total += subtotal
-                
-                order_items_data.append({
-                    'product': product,
-                    'quantity': quantity,
-                    'price': price,
-                    'size': item_data.get('size', ''),
-                    'subtotal': subtotal
-                })
-            
-            # Create order
+
+            # Check available stock and spread each product's quantity over its inventory rows
+            try:
+                allocations = allocate(requested, inventory_items, now=now)
+            except InsufficientStockError as e:
+                # Stock may come back (restock, expired holds), so a retry must really run again
+                return retryable(Response(
+                    {'error': f'Insufficient stock for {products[e.product_id].name}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                ))
+
+            # One conditional UPDATE for every row; the guard fails closed if stock moved meanwhile
+            updated = InventoryItem.objects.filter(available_guard(allocations, now=now)).update(
+                updated_at=now
+            )
+            if updated != len(allocations):
+                raise StockChangedError()
+            # A queryset update sends no signals, so refresh the cached stock here
+            transaction.on_commit(lambda: invalidate_catalog(product_ids=list(requested)))
+
+            total = Decimal('0.00')
+            for product_id, quantity, _ in lines:
+                total += Decimal(str(products[product_id].price)) * quantity
+
             order = Order.objects.create(
-                user_uid=request.user['uid'],
-                email=request.user['email'],
+                user_uid=user['uid'],
+                email=user['email'],
                 total=total,
                 shipping_info=data['shipping_info'],
-                payment_method=data['payment_method']
+                payment_method=data['payment_method'],
+                stock_reserved=True
             )
-            
-            # Create order items and update stock
-            for item_data in order_items_data:
-                OrderItem.objects.create(
+
+            OrderItem.objects.bulk_create([
+                OrderItem(
                     order=order,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    price=item_data['price'],
-                    size=item_data['size']
+                    product=products[product_id],
+                    quantity=quantity,
+                    price=Decimal(str(products[product_id].price)),
+                    size=size
                 )
-                
-                # Update inventory (simplified - assumes single inventory item per product)
-                inventory_item = InventoryItem.objects.filter(product=item_data['product']).first()
-                if inventory_item:
-                    inventory_item.stock -= item_data['quantity']
-                    inventory_item.save()
-                    
-                    # Record stock movement
-                    StockMovement.objects.create(
-                        product=item_data['product'],
-                        change=-item_data['quantity'],
-                        reason='sale',
-                        note=f'Order #{order.id}'
-                    )
-            
-            serializer = OrderSerializer(order)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
+                for product_id, quantity, size in lines
+            ])
+            hold(order, allocations, now)
+
+    except StockChangedError:
+        return Response(
+            {'error': 'Stock changed while placing the order, please try again'},
+            status=status.HTTP_409_CONFLICT
+        )
     except Exception as e:
         return Response(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+    order = Order.objects.prefetch_related(
+        Prefetch('items', queryset=OrderItem.objects.order_by('pk')),
+        Prefetch('items__product', queryset=Product.objects.with_stock())
+    ).get(pk=order.pk)
+    serializer = OrderSerializer(order)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def order_list(request):
     """List user's orders"""
-    orders = Order.objects.filter(user_uid=request.user['uid']).prefetch_related('items__product')
+    orders = Order.objects.filter(user_uid=request.user['uid']).prefetch_related(
+        Prefetch('items__product', queryset=Product.objects.with_stock())
+    )
     serializer = OrderSerializer(orders, many=True)
     return Response(serializer.data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def checkout_cbe(request):
     """Process checkout with CBE"""
     # This is a placeholder implementation
@@ -156,7 +263,7 @@ def checkout_cbe(request):
     # 3. Handle payment confirmation
     
     # For now, create order and simulate payment
-    order_response = create_order(request)
+    order_response = place_order(request.user, serializer.validated_data)
     if order_response.status_code == 201:
         order_data = order_response.data
         return Response({
@@ -169,6 +276,7 @@ def checkout_cbe(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@idempotent
 def checkout_telebirr(request):
     """Process checkout with Telebirr"""
     # This is a placeholder implementation
@@ -184,7 +292,7 @@ def checkout_telebirr(request):
     # 3. Handle payment confirmation
     
     # For now, create order and simulate payment
-    order_response = create_order(request)
+    order_response = place_order(request.user, serializer.validated_data)
     if order_response.status_code == 201:
         order_data = order_response.data
         return Response({
@@ -205,7 +313,7 @@ def contact_submit(request):
     data = serializer.validated_data
     
     try:
-        # Send email
+        # Queue the email; the send_queued_emails worker delivers it, so the request never waits on SMTP
         subject = f"Contact Form: Message from {data['name']}"
         message = f"""
         Name: {data['name']}
@@ -215,12 +323,11 @@ def contact_submit(request):
         {data['message']}
         """
         
-        send_mail(
+        enqueue_email(
             subject,
             message,
             data['email'],
             [settings.CONTACT_RECEIVER_EMAIL],
-            fail_silently=False,
         )
         
         return Response({'message': 'Message sent successfully'})
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, InventoryItem, InventoryChange
+from .models import Category, InventoryItem, InventoryChange, InventoryStats
+from .search import FullTextSearchAdminMixin
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -10,7 +11,7 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(InventoryItem)
-class InventoryItemAdmin(admin.ModelAdmin):
+class InventoryItemAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'sku', 'category', 'quantity', 'price', 'display_stock_status', 'owner', 'last_updated')
     list_filter = ('category', 'priority', 'owner', 'date_added')
     search_fields = ('name', 'sku', 'description')
@@ -52,3 +53,10 @@ class InventoryChangeAdmin(admin.ModelAdmin):
     search_fields = ('inventory_item__name', 'inventory_item__sku', 'reason')
     readonly_fields = ('timestamp',)
     ordering = ('-timestamp',)
+
+
+@admin.register(InventoryStats)
+class InventoryStatsAdmin(admin.ModelAdmin):
+    list_display = ('owner', 'category', 'item_count', 'total_value', 'low_stock_count', 'out_of_stock_count', 'overstocked_count', 'updated_at')
+    list_filter = ('owner',)
+    readonly_fields = ('updated_at',)
@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def repair_search_index(sender, using, **kwargs):
+    from .search import repair_search_index
+    repair_search_index(connections[using])
 
 
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'inventory'
\ No newline at end of file
+    name = 'inventory'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Migrations that remake the item table on SQLite drop the full-text triggers
+        post_migrate.connect(repair_search_index, sender=self)
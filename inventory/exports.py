@@ -0,0 +1,112 @@
+"""
+Streaming exports of inventory items and their change history.
+
+Rows are read with chunked values_list() iteration, so no model instances
+are built and memory stays flat however many rows are exported.
+"""
+import csv
+import datetime
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import InventoryItem, InventoryChange
+
+EXPORT_CHUNK_SIZE = 2000
+
+# kind -> (model, date field used for ranges, owner lookup, category lookup, exported columns)
+EXPORTS = {
+    'items': (
+        InventoryItem, 'last_updated', 'owner', 'category',
+        ('id', 'sku', 'name', 'category__name', 'quantity', 'price', 'minimum_stock_level',
+         'maximum_stock_level', 'priority', 'location', 'date_added', 'last_updated'),
+    ),
+    'changes': (
+        InventoryChange, 'timestamp', 'owner', 'inventory_item__category',
+        ('id', 'inventory_item', 'inventory_item__sku', 'change_type', 'quantity_changed',
+         'previous_quantity', 'new_quantity', 'reason', 'changed_by__username', 'timestamp'),
+    ),
+}
+FORMATS = ('csv', 'ndjson')
+
+
+class Echo:
+    """File-like object whose write() just returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def parse_bound(value):
+    """Parse an ISO date or datetime into an aware datetime (dates mean midnight)"""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f'Invalid date: {value}')
+        parsed = datetime.datetime.combine(date, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_rows(kind, owner=None, category=None, since=None, until=None):
+    """
+    Return (header, rows) for an export; since is inclusive, until exclusive.
+    """
+    model, date_field, owner_lookup, category_lookup, fields = EXPORTS[kind]
+    queryset = model.objects.all()
+    if owner is not None:
+        queryset = queryset.filter(**{owner_lookup: owner})
+    if category is not None:
+        queryset = queryset.filter(**{category_lookup: category})
+    if since is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{date_field}__lt': until})
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return fields, rows
+
+
+def render_csv(header, rows):
+    writer = csv.writer(Echo())
+    lines = [writer.writerow(header)]
+    for row in rows:
+        lines.append(writer.writerow(row))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def render_ndjson(header, rows):
+    encoder = DjangoJSONEncoder()
+    lines = []
+    for row in rows:
+        lines.append(encoder.encode(dict(zip(header, row))) + '\n')
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+RENDERERS = {'csv': render_csv, 'ndjson': render_ndjson}
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def render_export(output_format, header, rows, compress=False):
+    """Yield the export as bytes, gzip-compressed on the fly if requested"""
+    chunks = (chunk.encode('utf-8') for chunk in RENDERERS[output_format](header, rows))
+    if not compress:
+        yield from chunks
+        return
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,233 @@
+"""
+Bulk import of inventory items from CSV.
+
+The file is read in batches. Each batch resolves its category names with one
+query, checks its SKUs with one IN query and is written with a single upsert,
+so large onboarding files import at thousands of rows per second.
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+
+from .models import Category, InventoryItem, InventoryChange, InventoryChangeDaily, InventoryStats
+
+IMPORT_BATCH_SIZE = 1000
+REQUIRED_COLUMNS = ('sku', 'name', 'category', 'price')
+PRIORITIES = {value for value, _ in InventoryItem.PRIORITY_CHOICES}
+UPDATE_FIELDS = [
+    'name', 'description', 'quantity', 'price', 'category', 'minimum_stock_level',
+    'maximum_stock_level', 'priority', 'location', 'last_updated',
+]
+
+
+def parse_row(row):
+    """Validate one CSV row; returns (values, errors)"""
+    errors = []
+    values = {}
+    
+    def text(column, max_length, required=False):
+        value = (row.get(column) or '').strip()
+        if required and not value:
+            errors.append(f'{column} is required')
+        elif len(value) > max_length:
+            errors.append(f'{column} must be at most {max_length} characters')
+        return value
+    
+    def integer(column, default, minimum):
+        value = (row.get(column) or '').strip()
+        if not value:
+            return default
+        try:
+            number = int(value)
+        except ValueError:
+            errors.append(f'{column} must be an integer')
+            return default
+        if number < minimum:
+            errors.append(f'{column} must be at least {minimum}')
+        return number
+    
+    values['sku'] = text('sku', 50, required=True)
+    values['name'] = text('name', 200, required=True)
+    values['category'] = text('category', 100, required=True)
+    values['description'] = (row.get('description') or '').strip()
+    values['location'] = text('location', 100)
+    values['quantity'] = integer('quantity', 0, 0)
+    values['minimum_stock_level'] = integer('minimum_stock_level', 0, 0)
+    values['maximum_stock_level'] = integer('maximum_stock_level', 100, 1)
+    if values['maximum_stock_level'] <= values['minimum_stock_level']:
+        errors.append('maximum_stock_level must be greater than minimum_stock_level')
+    
+    values['priority'] = (row.get('priority') or '').strip() or 'medium'
+    if values['priority'] not in PRIORITIES:
+        errors.append(f"priority must be one of: {', '.join(sorted(PRIORITIES))}")
+    
+    price = (row.get('price') or '').strip()
+    try:
+        values['price'] = Decimal(price)
+        if not values['price'].is_finite() or values['price'] < 0:
+            raise InvalidOperation
+        _, digits, exponent = values['price'].as_tuple()
+        if exponent < -2 or len(digits) + exponent > 8:
+            errors.append('price must have at most 8 digits before and 2 after the decimal point')
+    except InvalidOperation:
+        errors.append('price must be a non-negative decimal')
+    return values, errors
+
+
+def import_items(owner, lines, batch_size=IMPORT_BATCH_SIZE, create_categories=True, record_changes=False):
+    """
+    Upsert items for owner from an iterable of CSV lines.
+    
+    Rows are keyed by sku; an existing sku of the same owner is updated, one
+    belonging to someone else is rejected. With record_changes, new items get
+    a restock change and updated quantities an adjustment change.
+    Returns a report with created/updated counts and per-row errors.
+    """
+    reader = csv.DictReader(lines)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        return {'created': 0, 'updated': 0, 'errors': [{'row': 1, 'errors': [f"Missing column(s): {', '.join(missing)}"]}]}
+    
+    report = {'created': 0, 'updated': 0, 'errors': []}
+    seen_skus = set()
+    with transaction.atomic():
+        # Row numbers count the header as row 1, like a spreadsheet
+        numbered = enumerate(reader, start=2)
+        while batch := list(islice(numbered, batch_size)):
+            import_batch(owner, batch, seen_skus, report, create_categories, record_changes)
+        # Upserts bypass the save signals, so refresh this owner's stats in one pass
+        InventoryStats.rebuild([owner.pk])
+    return report
+
+
+def upsert_rows(owner, rows, existing, create_categories):
+    """
+    Resolve the rows' categories, creating missing ones if asked to, and
+    upsert every row whose category exists. Returns the written items, their
+    previous quantities (None when created) and the per-row errors.
+    """
+    names = {values['category'] for _, values in rows}
+    categories = dict(Category.objects.filter(owner=owner, name__in=names).values_list('name', 'id'))
+    if create_categories and names - categories.keys():
+        Category.objects.bulk_create(
+            [Category(owner=owner, name=name) for name in names - categories.keys()],
+            ignore_conflicts=True
+        )
+        categories = dict(Category.objects.filter(owner=owner, name__in=names).values_list('name', 'id'))
+    
+    items = []
+    previous_quantities = []
+    errors = []
+    for row_number, values in rows:
+        if values['category'] not in categories:
+            errors.append({
+                'row': row_number, 'sku': values['sku'], 'errors': [f"unknown category: {values['category']}"]
+            })
+            continue
+        fields = {name: value for name, value in values.items() if name != 'category'}
+        items.append(InventoryItem(owner=owner, category_id=categories[values['category']], **fields))
+        previous_quantities.append(existing[values['sku']][1] if values['sku'] in existing else None)
+    if items:
+        InventoryItem.objects.bulk_create(
+            items, update_conflicts=True, unique_fields=['sku'], update_fields=UPDATE_FIELDS
+        )
+    return items, previous_quantities, errors
+
+
+def write_rows(owner, rows, existing, create_categories, report):
+    """
+    Upsert rows, returning the written items with their ids and their
+    previous quantities.
+    
+    A sku first inserted by another owner after the ownership check only shows
+    up once the upsert has hit it. The batch is then rolled back to a savepoint
+    and written again without those rows, so their data and categories are
+    never kept.
+    """
+    while rows:
+        savepoint = transaction.savepoint()
+        items, previous_quantities, errors = upsert_rows(owner, rows, existing, create_categories)
+        # Not every backend reports the ids of upserted rows, so read them back by sku
+        stored = {
+            sku: (pk, owner_id)
+            for sku, pk, owner_id in InventoryItem.objects.filter(
+                sku__in=[item.sku for item in items]
+            ).values_list('sku', 'pk', 'owner_id')
+        }
+        taken = {item.sku for item in items if stored[item.sku][1] != owner.pk}
+        if not taken:
+            transaction.savepoint_commit(savepoint)
+            report['errors'].extend(errors)
+            for item in items:
+                item.pk = stored[item.sku][0]
+            return items, previous_quantities
+        
+        transaction.savepoint_rollback(savepoint)
+        for row_number, values in rows:
+            if values['sku'] in taken:
+                report['errors'].append({
+                    'row': row_number, 'sku': values['sku'], 'errors': ['sku already belongs to another owner']
+                })
+        rows = [(row_number, values) for row_number, values in rows if values['sku'] not in taken]
+    return [], []
+
+
+def import_batch(owner, batch, seen_skus, report, create_categories, record_changes):
+    parsed = []
+    for row_number, row in batch:
+        values, errors = parse_row(row)
+        if not errors and values['sku'] in seen_skus:
+            errors.append('duplicate sku in file')
+        if errors:
+            report['errors'].append({'row': row_number, 'sku': values['sku'], 'errors': errors})
+            continue
+        seen_skus.add(values['sku'])
+        parsed.append((row_number, values))
+    if not parsed:
+        return
+    
+    # Locked so another import can't update these rows between the ownership check and the upsert
+    existing = {
+        sku: (owner_id, quantity)
+        for sku, owner_id, quantity in InventoryItem.objects.select_for_update().filter(
+            sku__in=[values['sku'] for _, values in parsed]
+        ).values_list('sku', 'owner_id', 'quantity')
+    }
+    rows = []
+    for row_number, values in parsed:
+        if values['sku'] in existing and existing[values['sku']][0] != owner.pk:
+            report['errors'].append({
+                'row': row_number, 'sku': values['sku'], 'errors': ['sku already belongs to another owner']
+            })
+        else:
+            rows.append((row_number, values))
+    
+    items, previous_quantities = write_rows(owner, rows, existing, create_categories, report)
+    if not items:
+        return
+    
+    created = sum(previous is None for previous in previous_quantities)
+    report['created'] += created
+    report['updated'] += len(items) - created
+    
+    if record_changes:
+        changes = []
+        for item, previous in zip(items, previous_quantities):
+            change_type = 'restock' if previous is None else 'adjustment'
+            previous = previous or 0
+            if item.quantity == previous:
+                continue
+            changes.append(InventoryChange(
+                inventory_item_id=item.pk,
+                change_type=change_type,
+                quantity_changed=item.quantity - previous,
+                previous_quantity=previous,
+                new_quantity=item.quantity,
+                reason='Bulk import',
+                changed_by=owner,
+                owner=owner
+            ))
+        InventoryChange.objects.bulk_create(changes)
+        InventoryChangeDaily.record(changes)
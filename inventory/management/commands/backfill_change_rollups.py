@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from inventory.models import InventoryChangeDaily
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the InventoryChangeDaily totals from the InventoryChange log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', action='append', help='Username to rebuild (repeatable); defaults to all owners')
+        parser.add_argument('--since', help='First day (YYYY-MM-DD) to rebuild; defaults to the whole history')
+
+    def handle(self, *args, **options):
+        owner_ids = None
+        if options['owner']:
+            owners = dict(CustomUser.objects.filter(username__in=options['owner']).values_list('username', 'id'))
+            missing = set(options['owner']) - owners.keys()
+            if missing:
+                raise CommandError(f"Unknown owner(s): {', '.join(sorted(missing))}")
+            owner_ids = list(owners.values())
+
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError(f"Invalid date: {options['since']}")
+
+        written = InventoryChangeDaily.rebuild(owner_ids, since=since)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} daily total(s)'))
@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.exports import EXPORTS, FORMATS, export_rows, parse_bound, render_export
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Stream inventory items or change history to a CSV or NDJSON file in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument('--format', dest='output_format', choices=FORMATS, default='csv')
+        parser.add_argument('--owner', help='Only export data owned by this username')
+        parser.add_argument('--category', type=int, help='Only export this category id')
+        parser.add_argument('--since', help='ISO date/datetime, inclusive')
+        parser.add_argument('--until', help='ISO date/datetime, exclusive')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('--output', default='-', help='File to write to; "-" for stdout')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['owner']:
+            owner = CustomUser.objects.filter(username=options['owner']).first()
+            if owner is None:
+                raise CommandError(f"Unknown owner: {options['owner']}")
+        try:
+            since = parse_bound(options['since']) if options['since'] else None
+            until = parse_bound(options['until']) if options['until'] else None
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        header, rows = export_rows(
+            options['kind'], owner=owner, category=options['category'], since=since, until=until
+        )
+        chunks = render_export(options['output_format'], header, rows, compress=options['gzip'])
+
+        if options['output'] == '-':
+            stream = sys.stdout.buffer
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
+            return
+
+        with open(options['output'], 'wb') as stream:
+            for chunk in chunks:
+                stream.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['output']}"))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.imports import IMPORT_BATCH_SIZE, import_items
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Bulk create or update inventory items from a CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with at least sku, name, category and price columns')
+        parser.add_argument('--owner', required=True, help='Username that will own the items')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--no-create-categories', action='store_true', help='Reject unknown category names')
+        parser.add_argument('--record-changes', action='store_true', help='Write restock/adjustment InventoryChange rows')
+
+    def handle(self, *args, **options):
+        owner = CustomUser.objects.filter(username=options['owner']).first()
+        if owner is None:
+            raise CommandError(f"Unknown owner: {options['owner']}")
+
+        started = time.perf_counter()
+        with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+            report = import_items(
+                owner,
+                lines,
+                batch_size=options['batch_size'],
+                create_categories=not options['no_create_categories'],
+                record_changes=options['record_changes']
+            )
+        elapsed = time.perf_counter() - started
+
+        for error in report['errors']:
+            self.stdout.write(f"row {error['row']} ({error.get('sku', '')}): {'; '.join(error['errors'])}")
+        rows = report['created'] + report['updated'] + len(report['errors'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']}, updated {report['updated']}, "
+            f"rejected {len(report['errors'])} in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)"
+        ))
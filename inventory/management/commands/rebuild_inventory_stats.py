@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.models import InventoryStats
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized InventoryStats rows from scratch and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--owner', action='append', help='Username to rebuild (repeatable); defaults to all owners')
+        parser.add_argument('--dry-run', action='store_true', help='Only report drift, do not fix it')
+
+    def handle(self, *args, **options):
+        owner_ids = None
+        if options['owner']:
+            owners = dict(CustomUser.objects.filter(username__in=options['owner']).values_list('username', 'id'))
+            missing = set(options['owner']) - owners.keys()
+            if missing:
+                raise CommandError(f"Unknown owner(s): {', '.join(sorted(missing))}")
+            owner_ids = list(owners.values())
+
+        drift = InventoryStats.rebuild(owner_ids, dry_run=options['dry_run'])
+
+        for owner_id, category_id, field, stored, expected in sorted(drift, key=lambda d: (d[0], d[1] or 0, d[2])):
+            scope = f'category {category_id}' if category_id is not None else 'all categories'
+            self.stdout.write(f'owner {owner_id}, {scope}: {field} stored={stored} expected={expected}')
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('No drift found'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} drifted value(s) found (not fixed)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(drift)} drifted value(s)'))
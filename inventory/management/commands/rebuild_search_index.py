@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from inventory.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recreate the full-text search index for inventory items and reindex every row'
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.stdout.write(self.style.WARNING(f'No full-text index for {connection.vendor}; search uses LIKE'))
+            return
+        # SQLite drops the sync triggers whenever a migration rebuilds the items table
+        install_search_index(connection)
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
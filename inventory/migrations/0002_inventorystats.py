@@ -0,0 +1,75 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:55
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InventoryStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("item_count", models.IntegerField(default=0)),
+                (
+                    "total_value",
+                    models.DecimalField(
+                        decimal_places=2, default=Decimal("0.00"), max_digits=16
+                    ),
+                ),
+                ("low_stock_count", models.IntegerField(default=0)),
+                ("out_of_stock_count", models.IntegerField(default=0)),
+                ("overstocked_count", models.IntegerField(default=0)),
+                ("categories_count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stats",
+                        to="inventory.category",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Inventory stats",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("owner", "category"),
+                        name="unique_category_inventory_stats",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("category__isnull", True)),
+                        fields=("owner",),
+                        name="unique_owner_inventory_stats",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0002_inventorystats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventorychange",
+            index=models.Index(
+                fields=["inventory_item", "-timestamp"], name="inv_change_item_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorychange",
+            index=models.Index(
+                fields=["change_type", "-timestamp"], name="inv_change_type_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                fields=["owner", "-last_updated"], name="inv_item_owner_updated_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                fields=["owner", "category"], name="inv_item_owner_category_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:19
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0005_item_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                models.F("owner"),
+                django.db.models.functions.text.Lower("sku"),
+                name="inv_item_owner_sku_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                models.F("owner"),
+                django.db.models.functions.text.Lower("name"),
+                name="inv_item_owner_name_lower_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0006_autocomplete_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InventoryChangeDaily",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "change_type",
+                    models.CharField(
+                        choices=[
+                            ("restock", "Restock"),
+                            ("sale", "Sale"),
+                            ("adjustment", "Adjustment"),
+                            ("damaged", "Damaged"),
+                            ("returned", "Returned"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("sum_qty", models.IntegerField(default=0)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "inventory_item",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_changes",
+                        to="inventory.inventoryitem",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Inventory change daily totals",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("inventory_item", "day", "change_type"),
+                        name="unique_inventory_change_daily",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_item_owner(apps, schema_editor):
+    InventoryChange = apps.get_model("inventory", "InventoryChange")
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    InventoryChange.objects.update(
+        owner=Subquery(
+            InventoryItem.objects.filter(pk=OuterRef("inventory_item")).values("owner")[
+                :1
+            ]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0007_inventory_change_daily"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="inventorychange",
+            name="inv_change_item_time_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="inventorychange",
+            name="inv_change_type_time_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="inventoryitem",
+            name="inv_item_owner_category_idx",
+        ),
+        migrations.AddField(
+            model_name="inventorychange",
+            name="owner",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="inventory_changes",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_item_owner, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="inventorychange",
+            name="owner",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="inventory_changes",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorychange",
+            index=models.Index(
+                fields=["inventory_item", "-timestamp", "-id"],
+                name="inv_change_item_time_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorychange",
+            index=models.Index(
+                fields=["owner", "-timestamp", "-id"], name="inv_change_owner_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventorychange",
+            index=models.Index(
+                fields=["owner", "change_type", "-timestamp", "-id"],
+                name="inv_change_owner_type_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                fields=["owner", "category", "-last_updated"],
+                name="inv_item_owner_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="inventoryitem",
+            index=models.Index(
+                condition=models.Q(("quantity__lte", models.F("minimum_stock_level"))),
+                fields=["owner", "-last_updated"],
+                name="inv_item_owner_low_stock_idx",
+            ),
+        ),
+    ]
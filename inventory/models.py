@@ -1,7 +1,31 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.conf import settings
+from django.db.models.functions import Lower, TruncDate
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from itertools import islice
+import datetime
+
+
+# Daily change totals inserted per statement when rebuilding them
+REBUILD_BATCH_SIZE = 2000
+
+STATS_COUNTERS = ('item_count', 'total_value', 'low_stock_count', 'out_of_stock_count', 'overstocked_count')
+
+# Fields an item's contribution to InventoryStats depends on
+STATS_FIELDS = {'owner_id', 'category_id', 'quantity', 'price', 'minimum_stock_level', 'maximum_stock_level'}
+
+
+def stock_counters(quantity, price, minimum_stock_level, maximum_stock_level):
+    """What a single item contributes to its owner's InventoryStats counters"""
+    return {
+        'item_count': 1,
+        'total_value': quantity * Decimal(str(price)),
+        'low_stock_count': int(quantity <= minimum_stock_level),
+        'out_of_stock_count': int(quantity == 0),
+        'overstocked_count': int(quantity >= maximum_stock_level),
+    }
 
 
 class Category(models.Model):
@@ -9,6 +33,7 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='categories')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Categories'
@@ -42,10 +67,31 @@ class InventoryItem(models.Model):
     
     class Meta:
         ordering = ['-last_updated']
+        indexes = [
+            models.Index(fields=['owner', '-last_updated'], name='inv_item_owner_updated_idx'),
+            models.Index(fields=['owner', 'category', '-last_updated'], name='inv_item_owner_category_idx'),
+            # Low stock report; a column-to-column comparison can only be indexed as a partial index
+            models.Index(
+                fields=['owner', '-last_updated'],
+                condition=models.Q(quantity__lte=models.F('minimum_stock_level')),
+                name='inv_item_owner_low_stock_idx'
+            ),
+            # Case-insensitive prefix ranges for the autocomplete action
+            models.Index(models.F('owner'), Lower('sku'), name='inv_item_owner_sku_lower_idx'),
+            models.Index(models.F('owner'), Lower('name'), name='inv_item_owner_name_lower_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.sku})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded stats contribution so a later save can apply a delta
+        if not instance.get_deferred_fields() & STATS_FIELDS:
+            instance._stats_state = instance.stats_state()
+        return instance
+    
     @property
     def is_low_stock(self):
         return self.quantity <= self.minimum_stock_level
@@ -64,12 +110,45 @@ class InventoryItem(models.Model):
             return 'overstocked'
         return 'normal'
     
-@property
-def total_value(self):
-    quantity = self.quantity or 0
-    price = self.price or Decimal('0.00')
-    return quantity * price
-
+    def apply_quantity_change(self, quantity_change):
+        """
+        Atomically add quantity_change to the stored quantity.
+        
+        The arithmetic runs in the database as a single conditional UPDATE, so
+        concurrent adjustments never lose updates and stock never goes negative.
+        Returns the new quantity, or None if there was not enough stock.
+        Call inside a transaction so the read-back sees this update only.
+        """
+        updated = InventoryItem.objects.filter(
+            pk=self.pk,
+            quantity__gte=-quantity_change
+        ).update(
+            quantity=models.F('quantity') + quantity_change,
+            last_updated=timezone.now()
+        )
+        if not updated:
+            return None
+        
+        new_quantity = InventoryItem.objects.values_list('quantity', flat=True).get(pk=self.pk)
+        self.quantity = new_quantity - quantity_change
+        before = self.stats_state()
+        self.quantity = new_quantity
+        self._stats_state = self.stats_state()
+        InventoryStats.record_changes([(before, self._stats_state)])
+        return self.quantity
+    
+    def stats_state(self):
+        return (
+            self.owner_id,
+            self.category_id,
+            stock_counters(self.quantity, self.price, self.minimum_stock_level, self.maximum_stock_level)
+        )
+    
+    @property
+    def total_value(self):
+        quantity = self.quantity or 0
+        price = self.price or Decimal('0.00')
+        return quantity * price
 
 
 class InventoryChange(models.Model):
@@ -89,18 +168,301 @@ class InventoryChange(models.Model):
     reason = models.CharField(max_length=200, blank=True)
     notes = models.TextField(blank=True)
     changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # Copy of inventory_item.owner, so an owner's change log is one index range in time order
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='inventory_changes', editable=False
+    )
     timestamp = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-timestamp']
+        # The change log pages by (timestamp, id), so both are in the indexes to avoid a sort
+        indexes = [
+            models.Index(fields=['inventory_item', '-timestamp', '-id'], name='inv_change_item_time_idx'),
+            models.Index(fields=['owner', '-timestamp', '-id'], name='inv_change_owner_time_idx'),
+            models.Index(fields=['owner', 'change_type', '-timestamp', '-id'], name='inv_change_owner_type_idx'),
+        ]
     
     def __str__(self):
         return f"{self.inventory_item.name} - {self.change_type} ({self.quantity_changed})"
     
+    def save(self, *args, **kwargs):
+        if self.owner_id is None:
+            self.owner_id = self.inventory_item.owner_id
+        super().save(*args, **kwargs)
+    
     @property
     def is_increase(self):
         return self.quantity_changed > 0
     
     @property
     def is_decrease(self):
-        return self.quantity_changed < 0
\ No newline at end of file
+        return self.quantity_changed < 0
+
+
+class InventoryChangeDaily(models.Model):
+    """
+    InventoryChange totals per item, day and change type, kept up to date
+    incrementally so history charts never scan the raw change log.
+    """
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='daily_changes')
+    day = models.DateField()
+    change_type = models.CharField(max_length=20, choices=InventoryChange.CHANGE_TYPE_CHOICES)
+    sum_qty = models.IntegerField(default=0)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'Inventory change daily totals'
+        constraints = [
+            # Also the index history queries range-scan by (item, day)
+            models.UniqueConstraint(
+                fields=['inventory_item', 'day', 'change_type'], name='unique_inventory_change_daily'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.inventory_item_id} {self.day} {self.change_type}: {self.sum_qty} ({self.count})"
+    
+    @classmethod
+    def record(cls, changes):
+        """
+        Add newly inserted InventoryChange rows to their daily totals.
+        
+        Existing rows are incremented with one bulk UPDATE and missing ones
+        created with one INSERT; a row created concurrently falls back to
+        per-row increments.
+        """
+        deltas = {}
+        for change in changes:
+            key = (change.inventory_item_id, timezone.localdate(change.timestamp), change.change_type)
+            delta = deltas.setdefault(key, [0, 0])
+            delta[0] += change.quantity_changed
+            delta[1] += 1
+        if not deltas:
+            return
+        
+        existing = cls.objects.filter(
+            inventory_item_id__in={key[0] for key in deltas},
+            day__in={key[1] for key in deltas},
+            change_type__in={key[2] for key in deltas},
+        ).only('id', 'inventory_item_id', 'day', 'change_type')
+        rows = []
+        for row in existing:
+            delta = deltas.pop((row.inventory_item_id, row.day, row.change_type), None)
+            if delta is not None:
+                row.sum_qty = models.F('sum_qty') + delta[0]
+                row.count = models.F('count') + delta[1]
+                rows.append(row)
+        if rows:
+            cls.objects.bulk_update(rows, ['sum_qty', 'count'])
+        if not deltas:
+            return
+        
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(inventory_item_id=item_id, day=day, change_type=change_type, sum_qty=sum_qty, count=count)
+                    for (item_id, day, change_type), (sum_qty, count) in deltas.items()
+                ])
+        except IntegrityError:
+            for (item_id, day, change_type), (sum_qty, count) in deltas.items():
+                cls.apply_delta(item_id, day, change_type, sum_qty, count)
+    
+    @classmethod
+    def apply_delta(cls, item_id, day, change_type, sum_qty, count):
+        rows = cls.objects.filter(inventory_item_id=item_id, day=day, change_type=change_type)
+        if rows.update(sum_qty=models.F('sum_qty') + sum_qty, count=models.F('count') + count):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    inventory_item_id=item_id, day=day, change_type=change_type, sum_qty=sum_qty, count=count
+                )
+        except IntegrityError:
+            # Created concurrently
+            rows.update(sum_qty=models.F('sum_qty') + sum_qty, count=models.F('count') + count)
+    
+    @classmethod
+    def rebuild(cls, owner_ids=None, since=None):
+        """
+        Recompute the totals from InventoryChange, for every item or only the
+        given owners' items, and for every day or only from the date since.
+        
+        Returns the number of daily rows written.
+        """
+        changes = InventoryChange.objects.order_by()
+        rollups = cls.objects.all()
+        if owner_ids is not None:
+            changes = changes.filter(owner_id__in=owner_ids)
+            rollups = rollups.filter(inventory_item__owner_id__in=owner_ids)
+        if since is not None:
+            changes = changes.filter(
+                timestamp__gte=timezone.make_aware(datetime.datetime.combine(since, datetime.time.min))
+            )
+            rollups = rollups.filter(day__gte=since)
+        
+        groups = changes.annotate(day=TruncDate('timestamp')).values(
+            'inventory_item_id', 'day', 'change_type'
+        ).annotate(sum_qty=models.Sum('quantity_changed'), count=models.Count('id'))
+        
+        written = 0
+        with transaction.atomic():
+            rollups.delete()
+            groups = iter(groups.iterator(chunk_size=REBUILD_BATCH_SIZE))
+            while True:
+                batch = [cls(**group) for group in islice(groups, REBUILD_BATCH_SIZE)]
+                if not batch:
+                    return written
+                cls.objects.bulk_create(batch)
+                written += len(batch)
+
+
+class InventoryStats(models.Model):
+    """
+    Materialized inventory counters, kept up to date incrementally.
+    
+    Each owner has one row with category=None covering all of their items,
+    plus one row per category they hold items in.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='inventory_stats')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='stats')
+    item_count = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    low_stock_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0)
+    overstocked_count = models.IntegerField(default=0)
+    categories_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Inventory stats'
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'category'], name='unique_category_inventory_stats'),
+            models.UniqueConstraint(
+                fields=['owner'], condition=models.Q(category__isnull=True), name='unique_owner_inventory_stats'
+            ),
+        ]
+    
+    def __str__(self):
+        scope = self.category.name if self.category_id else 'all categories'
+        return f"Stats for {self.owner} ({scope})"
+    
+    @classmethod
+    def record_changes(cls, changes):
+        """
+        Apply (before, after) pairs of InventoryItem.stats_state() values.
+        
+        Use None for before on creation and for after on deletion.
+        """
+        deltas = {}
+        initialize = set()
+        for before, after in changes:
+            for state, sign in ((before, -1), (after, 1)):
+                if state is None:
+                    continue
+                owner_id, category_id, counters = state
+                for key in ((owner_id, None), (owner_id, category_id)):
+                    delta = deltas.setdefault(key, dict.fromkeys(STATS_COUNTERS, 0))
+                    for name, value in counters.items():
+                        delta[name] += sign * value
+                    if sign > 0:
+                        initialize.add(key)
+        
+        for (owner_id, category_id), delta in deltas.items():
+            cls.apply_delta(owner_id, category_id, delta, initialize=(owner_id, category_id) in initialize)
+    
+    @classmethod
+    def apply_delta(cls, owner_id, category_id, delta, initialize=False):
+        """
+        Add delta to one stats row with a single UPDATE.
+        
+        A missing row is rebuilt from the items when initialize is set (the
+        change being recorded is already in the table), otherwise left missing.
+        """
+        changes = {name: models.F(name) + value for name, value in delta.items() if value}
+        if not changes:
+            return
+        rows = cls.objects.filter(owner_id=owner_id, category_id=category_id)
+        if rows.update(**changes, updated_at=timezone.now()) or not initialize:
+            return
+        
+        values = cls.compute([owner_id], category_id=category_id).get((owner_id, category_id), {})
+        try:
+            with transaction.atomic():
+                cls.objects.create(owner_id=owner_id, category_id=category_id, **values)
+        except IntegrityError:
+            # Created concurrently from a snapshot without this change
+            rows.update(**changes, updated_at=timezone.now())
+    
+    @classmethod
+    def compute(cls, owner_ids=None, category_id=None):
+        """
+        Compute stats from scratch, keyed by (owner_id, category_id).
+        
+        Passing category_id computes only that category's row.
+        """
+        items = InventoryItem.objects.order_by()
+        categories = Category.objects.order_by()
+        if owner_ids is not None:
+            items = items.filter(owner_id__in=owner_ids)
+            categories = categories.filter(owner_id__in=owner_ids)
+        if category_id is not None:
+            items = items.filter(category_id=category_id)
+        
+        groups = items.values('owner_id', 'category_id').annotate(
+            item_count=models.Count('id'),
+            total_value=models.Sum(models.F('quantity') * models.F('price')),
+            low_stock_count=models.Count('id', filter=models.Q(quantity__lte=models.F('minimum_stock_level'))),
+            out_of_stock_count=models.Count('id', filter=models.Q(quantity=0)),
+            overstocked_count=models.Count('id', filter=models.Q(quantity__gte=models.F('maximum_stock_level'))),
+        )
+        
+        stats = {}
+        for group in groups:
+            owner_id = group.pop('owner_id')
+            group['total_value'] = group['total_value'] or Decimal('0.00')
+            stats[(owner_id, group.pop('category_id'))] = group
+            if category_id is None:
+                totals = stats.setdefault((owner_id, None), dict.fromkeys(STATS_COUNTERS, 0))
+                for name in STATS_COUNTERS:
+                    totals[name] += group[name]
+        
+        if category_id is None:
+            for owner_id, count in categories.values_list('owner_id').annotate(count=models.Count('id')):
+                totals = stats.setdefault((owner_id, None), dict.fromkeys(STATS_COUNTERS, 0))
+                totals['categories_count'] = count
+        return stats
+    
+    @classmethod
+    def rebuild(cls, owner_ids=None, dry_run=False):
+        """
+        Recompute stats from the items and fix any stored row that drifted.
+        
+        Returns a list of (owner_id, category_id, field, stored, expected).
+        """
+        fields = STATS_COUNTERS + ('categories_count',)
+        expected = cls.compute(owner_ids)
+        stored = cls.objects.all()
+        if owner_ids is not None:
+            stored = stored.filter(owner_id__in=owner_ids)
+        stored = {(row.owner_id, row.category_id): row for row in stored}
+        
+        drift = []
+        with transaction.atomic():
+            for key in expected.keys() | stored.keys():
+                values = {name: 0 for name in fields}
+                values.update(expected.get(key, {}))
+                if key[1] is not None:
+                    values.pop('categories_count')
+                row = stored.get(key)
+                mismatched = [
+                    (name, getattr(row, name) if row else None, value)
+                    for name, value in values.items()
+                    if row is None or getattr(row, name) != value
+                ]
+                if not mismatched:
+                    continue
+                drift.extend((*key, name, old, new) for name, old, new in mismatched)
+                if not dry_run:
+                    cls.objects.update_or_create(owner_id=key[0], category_id=key[1], defaults=values)
+        return drift
\ No newline at end of file
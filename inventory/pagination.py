@@ -0,0 +1,31 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class InventoryChangeCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the change log, newest first.
+    
+    Pages are located by (timestamp, id) instead of COUNT(*) plus OFFSET, so
+    deep pages stay cheap and rows inserted meanwhile don't shift them.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class OptInPageNumberMixin:
+    """
+    Use keyset pagination unless the client asks for ?page=N.
+    
+    Page-number mode stays available for clients that need a total count.
+    """
+    cursor_pagination_class = InventoryChangeCursorPagination
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if PageNumberPagination.page_query_param in self.request.query_params:
+                self._paginator = PageNumberPagination()
+            else:
+                self._paginator = self.cursor_pagination_class()
+        return self._paginator
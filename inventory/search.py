@@ -0,0 +1,163 @@
+import re
+
+from rest_framework.filters import OrderingFilter, SearchFilter
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+SQLITE_TABLE = 'inventory_item_fts'
+POSTGRES_COLUMN = 'search_vector'
+
+# External-content FTS5 table over the item columns, kept in sync by triggers so
+# bulk_create/bulk_update/queryset.update() writes are indexed as well as save()/delete()
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5(
+        name, sku, description,
+        content='inventory_inventoryitem', content_rowid='id', tokenize='unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_insert AFTER INSERT ON inventory_inventoryitem BEGIN
+        INSERT INTO {SQLITE_TABLE}(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_delete AFTER DELETE ON inventory_inventoryitem BEGIN
+        INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_update
+    AFTER UPDATE OF name, sku, description ON inventory_inventoryitem BEGIN
+        INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, name, sku, description)
+        VALUES ('delete', old.id, old.name, old.sku, old.description);
+        INSERT INTO {SQLITE_TABLE}(rowid, name, sku, description)
+        VALUES (new.id, new.name, new.sku, new.description);
+    END""",
+    f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_TRIGGERS = {f'{SQLITE_TABLE}_insert', f'{SQLITE_TABLE}_delete', f'{SQLITE_TABLE}_update'}
+SQLITE_UNINSTALL = [
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_insert',
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_delete',
+    f'DROP TRIGGER IF EXISTS {SQLITE_TABLE}_update',
+    f'DROP TABLE IF EXISTS {SQLITE_TABLE}',
+]
+
+# A stored generated column is maintained by PostgreSQL itself on every write
+POSTGRES_INSTALL = [
+    f"""ALTER TABLE inventory_inventoryitem ADD COLUMN IF NOT EXISTS {POSTGRES_COLUMN} tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED""",
+    f'CREATE INDEX IF NOT EXISTS inv_item_search_idx ON inventory_inventoryitem USING GIN ({POSTGRES_COLUMN})',
+]
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS inv_item_search_idx',
+    f'ALTER TABLE inventory_inventoryitem DROP COLUMN IF EXISTS {POSTGRES_COLUMN}',
+]
+
+
+def install_search_index(db_connection):
+    """Create (or repair) the full-text index for the connection's database, if it has one"""
+    statements = {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}.get(db_connection.vendor, [])
+    with db_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def repair_search_index(db_connection):
+    """
+    Reinstall the SQLite triggers if a table remake (AlterField, RemoveField, ...)
+    dropped them along with the old table, re-indexing writes made since.
+    """
+    if db_connection.vendor != 'sqlite':
+        return
+    names = [SQLITE_TABLE, *SQLITE_TRIGGERS]
+    with db_connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+    # Leave databases the search index migration hasn't been (or no longer is) applied to alone
+    if SQLITE_TABLE in existing and not SQLITE_TRIGGERS <= existing:
+        install_search_index(db_connection)
+
+
+def uninstall_search_index(db_connection):
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}.get(db_connection.vendor, [])
+    with db_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def supports_full_text_search(queryset):
+    from .models import InventoryItem
+    return (
+        queryset.model is InventoryItem
+        and getattr(settings, 'INVENTORY_FULL_TEXT_SEARCH', True)
+        and connections[queryset.db].vendor in ('sqlite', 'postgresql')
+    )
+
+
+def full_text_search(queryset, search_term):
+    """
+    Filter items to those matching every word of search_term (as a prefix) and
+    annotate search_rank, higher meaning more relevant.
+    """
+    words = re.findall(r'\w+', search_term)
+    if not words:
+        return queryset
+    table = queryset.model._meta.db_table
+    if connections[queryset.db].vendor == 'postgresql':
+        query = ' & '.join(f'{word}:*' for word in words)
+        matches = f"{table}.{POSTGRES_COLUMN} @@ to_tsquery('simple', %s)"
+        rank = f"ts_rank({table}.{POSTGRES_COLUMN}, to_tsquery('simple', %s))"
+        return queryset.filter(RawSQL(matches, [query], output_field=BooleanField())).annotate(
+            search_rank=RawSQL(rank, [query], output_field=FloatField())
+        )
+    query = ' '.join(f'"{word}"*' for word in words)
+    matches = f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s'
+    # bm25 is lower for better matches; name and sku weigh more than description. The
+    # matches are ranked once into a materialized table that each row looks its rank up
+    # in; re-running MATCH per row would expand the prefix terms again for every item.
+    rank = f"""WITH ranked AS MATERIALIZED (
+        SELECT rowid AS id, -bm25({SQLITE_TABLE}, 10.0, 10.0, 1.0) AS rank
+        FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s
+    ) SELECT rank FROM ranked WHERE ranked.id = {table}.id"""
+    return queryset.filter(pk__in=RawSQL(matches, [query])).annotate(
+        search_rank=RawSQL(rank, [query], output_field=FloatField())
+    )
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter that uses the full-text index for inventory items, ranking
+    the results, and plain LIKE matching on search_fields everywhere else.
+    
+    Set INVENTORY_FULL_TEXT_SEARCH = False to fall back to LIKE for items too.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        search_term = request.query_params.get(self.search_param, '')
+        if search_term and getattr(view, 'search_fields', None) and supports_full_text_search(queryset):
+            return full_text_search(queryset, search_term)
+        return super().filter_queryset(request, queryset, view)
+
+
+class RankedOrderingFilter(OrderingFilter):
+    """OrderingFilter that puts the best search matches first unless ?ordering= is given"""
+    
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            default = self.get_default_ordering(view) or []
+            return queryset.order_by('-search_rank', *default)
+        return super().filter_queryset(request, queryset, view)
+
+
+class FullTextSearchAdminMixin:
+    """ModelAdmin mixin routing the changelist search box through the full-text index"""
+    
+    def get_search_results(self, request, queryset, search_term):
+        if search_term and supports_full_text_search(queryset):
+            return full_text_search(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
\ No newline at end of file
@@ -1,18 +1,40 @@
 from rest_framework import serializers
+from django.db import models
+from django.db.models import Sum
+from decimal import Decimal
 from .models import Category, InventoryItem, InventoryChange
 
 
 class CategorySerializer(serializers.ModelSerializer):
     items_count = serializers.SerializerMethodField()
+    low_stock_count = serializers.SerializerMethodField()
+    total_value = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
-        fields = ('id', 'name', 'description', 'created_at', 'items_count')
+        fields = ('id', 'name', 'description', 'created_at', 'items_count', 'low_stock_count', 'total_value')
         read_only_fields = ('id', 'created_at')
     
+    # CategoryViewSet annotates these; the fallbacks only run for freshly saved instances
     def get_items_count(self, obj):
+        if hasattr(obj, 'items_count'):
+            return obj.items_count
         return obj.items.count()
     
+    def get_low_stock_count(self, obj):
+        if hasattr(obj, 'low_stock_count'):
+            return obj.low_stock_count
+        return obj.items.filter(quantity__lte=models.F('minimum_stock_level')).count()
+    
+    def get_total_value(self, obj):
+        if hasattr(obj, 'total_value'):
+            value = obj.total_value
+        else:
+            value = obj.items.aggregate(
+                total=Sum(models.F('quantity') * models.F('price'))
+            )['total'] or Decimal('0.00')
+        return f'{value:.2f}'
+    
     def create(self, validated_data):
         validated_data['owner'] = self.context['request'].user
         return super().create(validated_data)
@@ -49,14 +71,21 @@ class InventoryItemDetailSerializer(InventoryItemSerializer):
     changes_count = serializers.SerializerMethodField()
     recent_changes = serializers.SerializerMethodField()
     
+    RECENT_CHANGES_LIMIT = 5
+    
     class Meta(InventoryItemSerializer.Meta):
         fields = InventoryItemSerializer.Meta.fields + ('changes_count', 'recent_changes')
     
+    # InventoryItemViewSet annotates/prefetches these; the fallbacks cover other callers
     def get_changes_count(self, obj):
+        if hasattr(obj, 'changes_count'):
+            return obj.changes_count
         return obj.changes.count()
     
     def get_recent_changes(self, obj):
-        recent_changes = obj.changes.all()[:5]
+        recent_changes = getattr(obj, 'prefetched_recent_changes', None)
+        if recent_changes is None:
+            recent_changes = obj.changes.select_related('changed_by')[:self.RECENT_CHANGES_LIMIT]
         return InventoryChangeSerializer(recent_changes, many=True).data
 
 
@@ -92,4 +121,32 @@ class QuantityAdjustmentSerializer(serializers.Serializer):
     def validate_quantity_change(self, value):
         if value == 0:
             raise serializers.ValidationError("Quantity change cannot be zero")
-        return value
\ No newline at end of file
+        return value
+
+
+class BulkAdjustmentEntrySerializer(QuantityAdjustmentSerializer):
+    id = serializers.IntegerField(required=False)
+    sku = serializers.CharField(max_length=50, required=False)
+    
+    def validate(self, attrs):
+        if 'id' not in attrs and 'sku' not in attrs:
+            raise serializers.ValidationError("Each adjustment must include an id or a sku")
+        return attrs
+
+
+class BulkQuantityAdjustmentSerializer(serializers.Serializer):
+    adjustments = serializers.ListField(
+        child=BulkAdjustmentEntrySerializer(),
+        allow_empty=False,
+        max_length=1000
+    )
+
+
+class BatchRetrieveSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=5000)
+    skus = serializers.ListField(child=serializers.CharField(max_length=50), required=False, max_length=5000)
+    
+    def validate(self, attrs):
+        if bool(attrs.get('ids')) == bool(attrs.get('skus')):
+            raise serializers.ValidationError("Provide either ids or skus")
+        return attrs
\ No newline at end of file
@@ -0,0 +1,46 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, InventoryItem, InventoryChange, InventoryChangeDaily, InventoryStats, STATS_FIELDS
+
+
+@receiver(pre_save, sender=InventoryItem)
+def remember_stats_state(sender, instance, raw, **kwargs):
+    # Instances not loaded from the database need their stored state fetched
+    if raw or instance.pk is None or hasattr(instance, '_stats_state'):
+        return
+    previous = sender.objects.filter(pk=instance.pk).only(*STATS_FIELDS).first()
+    instance._stats_state = previous.stats_state() if previous else None
+
+
+@receiver(post_save, sender=InventoryItem)
+def update_stats_on_item_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    before = None if created else getattr(instance, '_stats_state', None)
+    after = instance.stats_state()
+    InventoryStats.record_changes([(before, after)])
+    instance._stats_state = after
+
+
+@receiver(post_delete, sender=InventoryItem)
+def update_stats_on_item_delete(sender, instance, **kwargs):
+    before = getattr(instance, '_stats_state', None) or instance.stats_state()
+    InventoryStats.record_changes([(before, None)])
+
+
+@receiver(post_save, sender=Category)
+def update_stats_on_category_save(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        InventoryStats.apply_delta(instance.owner_id, None, {'categories_count': 1}, initialize=True)
+
+
+@receiver(post_delete, sender=Category)
+def update_stats_on_category_delete(sender, instance, **kwargs):
+    InventoryStats.apply_delta(instance.owner_id, None, {'categories_count': -1})
+
+
+@receiver(post_save, sender=InventoryChange)
+def update_daily_totals_on_change_save(sender, instance, created, raw, **kwargs):
+    # bulk_create sends no signals; its callers record the changes themselves
+    if created and not raw:
+        InventoryChangeDaily.record([instance])
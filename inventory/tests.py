@@ -0,0 +1,386 @@
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import unittest
+
+from .imports import import_items, write_rows
+from .models import Category, InventoryChange, InventoryItem
+from .search import SQLITE_TRIGGERS, full_text_search
+from .views import InventoryChangeViewSet, InventoryItemViewSet
+from users.models import CustomUser
+
+
+class CategoryListQueryTests(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        self.client.force_authenticate(self.user)
+    
+    def create_categories(self, count):
+        categories = Category.objects.bulk_create([
+            Category(name=f'Category {i:03}', owner=self.user) for i in range(count)
+        ])
+        InventoryItem.objects.bulk_create([
+            InventoryItem(
+                name=f'Item {category.pk}-{i}', sku=f'SKU-{category.pk}-{i}', quantity=i,
+                minimum_stock_level=1, price='2.50', category=category, owner=self.user
+            )
+            for category in categories
+            for i in range(3)
+        ])
+    
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        url = reverse('category-list')
+        for count in (3, 20):
+            with self.subTest(categories=count):
+                Category.objects.filter(owner=self.user).delete()
+                self.create_categories(count)
+                # One COUNT for the paginator and one SELECT with the counters annotated
+                with self.assertNumQueries(2):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['results']), count)
+                first = response.data['results'][0]
+                self.assertEqual(first['items_count'], 3)
+                self.assertEqual(first['low_stock_count'], 2)
+                self.assertEqual(str(first['total_value']), '7.50')
+
+
+class ConditionalListTests(APITestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        self.client.force_authenticate(self.owner)
+        category = Category.objects.create(name='Hardware', owner=self.owner)
+        self.items = [
+            InventoryItem.objects.create(sku=f'SKU-{i}', name=f'Item {i}', price='1.00', category=category, owner=self.owner)
+            for i in range(3)
+        ]
+    
+    def test_unchanged_list_is_not_modified(self):
+        first = self.client.get(reverse('inventoryitem-list'))
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Last-Modified', first)
+        again = self.client.get(reverse('inventoryitem-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+    
+    def test_deleting_an_older_item_changes_the_etag(self):
+        first = self.client.get(reverse('inventoryitem-list'))
+        
+        # The newest last_updated is unchanged by this delete
+        self.items[0].delete()
+        
+        response = self.client.get(reverse('inventoryitem-list'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.data['count'], 2)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Expected plans are written for SQLite')
+class FullTextSearchTests(APITestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        self.client.force_authenticate(self.owner)
+        category = Category.objects.create(name='Hardware', owner=self.owner)
+        for sku, name, description in [
+            ('W-1', 'Blue widget', 'Steel bracket'),
+            ('B-1', 'Bracket', 'Fits the blue widget'),
+            ('S-1', 'Steel screw', 'Pack of 100'),
+        ]:
+            InventoryItem.objects.create(
+                sku=sku, name=name, description=description, price='1.00', category=category, owner=self.owner
+            )
+        other = CustomUser.objects.create_user(username='other', email='other@example.com')
+        InventoryItem.objects.create(
+            sku='W-2', name='Widget', price='1.00', owner=other,
+            category=Category.objects.create(name='Hardware', owner=other)
+        )
+    
+    def search(self, term):
+        response = self.client.get(reverse('inventoryitem-list'), {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['sku'] for item in response.data['results']]
+    
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('wid'), ['W-1', 'B-1'])
+    
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('blue steel'), ['W-1'])
+        self.assertEqual(self.search('nothing'), [])
+    
+    def test_explicit_ordering_wins_over_rank(self):
+        response = self.client.get(reverse('inventoryitem-list'), {'search': 'wid', 'ordering': '-name'})
+        self.assertEqual([item['sku'] for item in response.data['results']], ['B-1', 'W-1'])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'The triggers only exist on SQLite')
+class SearchIndexRepairTests(TransactionTestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        self.category = Category.objects.create(name='Hardware', owner=self.owner)
+    
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            return {row[0] for row in cursor.fetchall()} & SQLITE_TRIGGERS
+    
+    def search(self, term):
+        return list(full_text_search(InventoryItem.objects.all(), term).values_list('sku', flat=True))
+    
+    def remake_item_table(self):
+        # Altering a column on SQLite copies the rows into a new table and drops the old one
+        old_field = InventoryItem._meta.get_field('description')
+        new_field = models.TextField(blank=True, null=True)
+        new_field.set_attributes_from_name('description')
+        with connection.schema_editor() as editor:
+            editor.alter_field(InventoryItem, old_field, new_field)
+            editor.alter_field(InventoryItem, new_field, old_field)
+    
+    def test_migrate_reinstalls_triggers_dropped_by_table_remake(self):
+        InventoryItem.objects.create(sku='W-1', name='Widget', price='1.00', category=self.category, owner=self.owner)
+        
+        self.remake_item_table()
+        self.assertEqual(self.triggers(), set())
+        # Written while the triggers are missing, picked up by the repair
+        InventoryItem.objects.create(sku='G-1', name='Gadget', price='1.00', category=self.category, owner=self.owner)
+        
+        call_command('migrate', verbosity=0)
+        
+        self.assertEqual(self.triggers(), SQLITE_TRIGGERS)
+        self.assertEqual(self.search('widget'), ['W-1'])
+        self.assertEqual(self.search('gadget'), ['G-1'])
+        
+        item = InventoryItem.objects.create(
+            sku='S-1', name='Sprocket', price='1.00', category=self.category, owner=self.owner
+        )
+        self.assertEqual(self.search('sprocket'), ['S-1'])
+        item.name = 'Flange'
+        item.save()
+        self.assertEqual(self.search('sprocket'), [])
+        self.assertEqual(self.search('flange'), ['S-1'])
+        item.delete()
+        self.assertEqual(self.search('flange'), [])
+
+
+class ChangeOwnerTests(APITestCase):
+    """Every way of recording a change copies the item's owner onto it"""
+    
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        self.client.force_authenticate(self.owner)
+        self.item = InventoryItem.objects.create(
+            name='Widget', sku='W-1', quantity=10, price='1.00', owner=self.owner,
+            category=Category.objects.create(name='Hardware', owner=self.owner)
+        )
+    
+    def assertOwnedChanges(self, count):
+        self.assertEqual(InventoryChange.objects.count(), count)
+        self.assertFalse(InventoryChange.objects.exclude(owner=self.owner).exists())
+    
+    def test_adjust_quantity(self):
+        response = self.client.post(
+            reverse('inventoryitem-adjust-quantity', args=[self.item.pk]),
+            {'quantity_change': -2, 'change_type': 'sale'}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertOwnedChanges(1)
+    
+    def test_bulk_adjust(self):
+        response = self.client.post(reverse('inventoryitem-bulk-adjust'), {'adjustments': [
+            {'id': self.item.pk, 'quantity_change': 5, 'change_type': 'restock'},
+            {'sku': 'W-1', 'quantity_change': -1, 'change_type': 'sale'},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertOwnedChanges(2)
+    
+    def test_import(self):
+        report = import_items(
+            self.owner, ['sku,name,category,price,quantity', 'W-1,Widget,Hardware,1.00,12', 'B-1,Bolt,Hardware,0.10,3'],
+            record_changes=True
+        )
+        
+        self.assertEqual((report['created'], report['updated']), (1, 1))
+        self.assertOwnedChanges(2)
+    
+    def test_admin_add(self):
+        admin = CustomUser.objects.create_superuser(username='admin', email='admin@example.com', password='secret')
+        self.client.force_login(admin)
+        
+        response = self.client.post(reverse('admin:inventory_inventorychange_add'), {
+            'inventory_item': self.item.pk, 'change_type': 'damaged', 'quantity_changed': -1,
+            'previous_quantity': 10, 'new_quantity': 9, 'reason': '', 'notes': '', 'changed_by': admin.pk,
+        })
+        
+        self.assertEqual(response.status_code, 302)
+        self.assertOwnedChanges(1)
+        self.assertEqual(InventoryChange.objects.get().changed_by, admin)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Expected plans are written for SQLite')
+class HotQueryPlanTests(TestCase):
+    """
+    EXPLAIN the querysets the viewsets build for their hot list endpoints and
+    check each is served by its index without a sort.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        cls.item = InventoryItem.objects.create(
+            name='Widget', sku='W-1', price='1.00', owner=cls.owner,
+            category=Category.objects.create(name='Hardware', owner=cls.owner)
+        )
+    
+    def view(self, viewset, action, params=None, **kwargs):
+        """A viewset instance set up as dispatch() would for a GET of action by the owner"""
+        request = APIRequestFactory().get('/', params or {})
+        force_authenticate(request, user=self.owner)
+        view = viewset(action_map={'get': action}, format_kwarg=None, args=(), kwargs=kwargs)
+        view.request = view.initialize_request(request)
+        return view
+    
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertRegex(plan, rf'USING (COVERING )?INDEX {index_name}\b')
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_inventory_list(self):
+        view = self.view(InventoryItemViewSet, 'list')
+        self.assertUsesIndex(view.filter_queryset(view.get_queryset()), 'inv_item_owner_updated_idx')
+    
+    def test_low_stock(self):
+        view = self.view(InventoryItemViewSet, 'low_stock')
+        # As low_stock() builds it before handing it to stock_report()
+        queryset = view.get_queryset().filter(quantity__lte=models.F('minimum_stock_level'))
+        self.assertUsesIndex(view.filter_queryset(queryset), 'inv_item_owner_low_stock_idx')
+    
+    def test_item_recent_changes(self):
+        view = self.view(InventoryItemViewSet, 'retrieve', pk=self.item.pk)
+        # The recent changes are prefetched by a second, windowed query
+        with CaptureQueriesContext(connection) as queries:
+            view.get_object()
+        self.assertEqual(len(queries), 2)
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries[1]['sql']}")
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        # Only the final ordering of the (at most RECENT_CHANGES_LIMIT per item) rows is sorted
+        self.assertRegex(plan, r'SEARCH inventory_inventorychange USING INDEX inv_change_item_time_idx\b')
+    
+    def test_changes_by_type(self):
+        view = self.view(InventoryChangeViewSet, 'by_type', {'type': 'sale'})
+        # As by_type() builds it
+        queryset = view.get_queryset().filter(change_type=view.request.query_params['type'])
+        self.assertUsesIndex(view.filter_queryset(queryset), 'inv_change_owner_type_idx')
+    
+    def test_owner_change_log(self):
+        view = self.view(InventoryChangeViewSet, 'list')
+        self.assertUsesIndex(view.filter_queryset(view.get_queryset()), 'inv_change_owner_time_idx')
+    
+    def test_recent_changes(self):
+        view = self.view(InventoryChangeViewSet, 'recent')
+        self.assertUsesIndex(view.get_queryset()[:50], 'inv_change_owner_time_idx')
+
+
+class ImportItemsTests(TestCase):
+    HEADER = 'sku,name,category,price,quantity'
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        cls.other = CustomUser.objects.create_user(username='other', email='other@example.com')
+        cls.other_item = InventoryItem.objects.create(
+            name='Theirs', sku='TAKEN-1', quantity=5, price='1.00', owner=cls.other,
+            category=Category.objects.create(name='Other', owner=cls.other)
+        )
+    
+    def test_upsert_records_changes_against_the_written_items(self):
+        import_items(self.owner, [self.HEADER, 'A-1,Apple,Fruit,1.00,4'])
+        report = import_items(
+            self.owner, [self.HEADER, 'A-1,Apple,Fruit,1.00,10', 'B-1,Banana,Fruit,0.50,3'], record_changes=True
+        )
+        
+        self.assertEqual(report, {'created': 1, 'updated': 1, 'errors': []})
+        changes = {
+            change.inventory_item.sku: (change.change_type, change.quantity_changed)
+            for change in InventoryChange.objects.filter(owner=self.owner).select_related('inventory_item')
+        }
+        self.assertEqual(changes, {'A-1': ('adjustment', 6), 'B-1': ('restock', 3)})
+    
+    def test_rejected_rows_create_no_categories(self):
+        report = import_items(self.owner, [
+            self.HEADER, 'TAKEN-1,Stolen,Loot,1.00,1', 'C-1,Cherry,Bad price,abc,1', 'D-1,Date,Fruit,2.00,1'
+        ])
+        
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([error['row'] for error in sorted(report['errors'], key=lambda e: e['row'])], [2, 3])
+        self.assertEqual(list(Category.objects.filter(owner=self.owner).values_list('name', flat=True)), ['Fruit'])
+        self.other_item.refresh_from_db()
+        self.assertEqual((self.other_item.name, self.other_item.quantity), ('Theirs', 5))
+    
+    def test_sku_taken_after_the_check_is_rolled_back(self):
+        # As if the other owner inserted TAKEN-1 between the ownership check and the upsert
+        report = {'created': 0, 'updated': 0, 'errors': []}
+        rows = [
+            (2, {'sku': 'TAKEN-1', 'name': 'Stolen', 'category': 'Loot', 'price': '1.00', 'quantity': 1}),
+            (3, {'sku': 'E-1', 'name': 'Elderberry', 'category': 'Fruit', 'price': '3.00', 'quantity': 2}),
+        ]
+        
+        items, previous_quantities = write_rows(self.owner, rows, {}, True, report)
+        
+        self.assertEqual([item.sku for item in items], ['E-1'])
+        self.assertEqual(items[0].pk, InventoryItem.objects.get(sku='E-1').pk)
+        self.assertEqual(previous_quantities, [None])
+        self.assertEqual(report['errors'], [
+            {'row': 2, 'sku': 'TAKEN-1', 'errors': ['sku already belongs to another owner']}
+        ])
+        self.other_item.refresh_from_db()
+        self.assertEqual((self.other_item.name, self.other_item.quantity), ('Theirs', 5))
+        self.assertFalse(Category.objects.filter(owner=self.owner, name='Loot').exists())
+
+
+class ConcurrentAdjustQuantityTests(TransactionTestCase):
+    """Sales racing for the last units of an item must never oversell or lose an update"""
+    THREADS = 8
+    SALES_PER_THREAD = 10
+    QUANTITY = 25
+    
+    def test_concurrent_sales_apply_exactly_the_stock(self):
+        owner = CustomUser.objects.create_user(username='owner', email='owner@example.com')
+        item = InventoryItem.objects.create(
+            name='Last units', sku='LAST-1', quantity=self.QUANTITY, price='1.00', owner=owner,
+            category=Category.objects.create(name='Racing', owner=owner)
+        )
+        url = reverse('inventoryitem-adjust-quantity', args=[item.pk])
+        start = threading.Barrier(self.THREADS)
+        
+        def sell(_):
+            client = APIClient()
+            client.force_authenticate(owner)
+            start.wait()
+            try:
+                return [
+                    client.post(url, {'quantity_change': -1, 'change_type': 'sale'}, format='json').status_code
+                    for _ in range(self.SALES_PER_THREAD)
+                ]
+            finally:
+                connection.close()
+        
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            statuses = [code for codes in pool.map(sell, range(self.THREADS)) for code in codes]
+        
+        self.assertEqual(statuses.count(200), self.QUANTITY)
+        self.assertEqual(statuses.count(400), self.THREADS * self.SALES_PER_THREAD - self.QUANTITY)
+        item.refresh_from_db()
+        self.assertEqual(item.quantity, 0)
+        # Every unit sold appears exactly once in the change log, one step at a time
+        changes = list(
+            InventoryChange.objects.filter(inventory_item=item).values_list('previous_quantity', 'new_quantity')
+        )
+        self.assertEqual(sorted(new for _, new in changes), list(range(self.QUANTITY)))
+        self.assertTrue(all(previous - new == 1 for previous, new in changes))
@@ -2,13 +2,74 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Sum, Count
-from .models import Category, InventoryItem, InventoryChange
+from rest_framework.utils.encoders import JSONEncoder
+from django.db import models, transaction
+from django.db.models import Q, Sum, Count, Max
+from django.db.models.functions import Coalesce, Lower, Trunc
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.cache import get_conditional_response, patch_cache_control
+from itertools import islice
+import hashlib
+import io
+from .models import Category, InventoryItem, InventoryChange, InventoryChangeDaily, InventoryStats
 from .serializers import (
     CategorySerializer, InventoryItemSerializer, InventoryItemDetailSerializer,
-    InventoryChangeSerializer, QuantityAdjustmentSerializer
+    InventoryChangeSerializer, QuantityAdjustmentSerializer, BulkQuantityAdjustmentSerializer,
+    BatchRetrieveSerializer
 )
 from .permissions import IsOwnerOrReadOnly
+from .pagination import OptInPageNumberMixin
+from .exports import FORMATS, CONTENT_TYPES, export_rows, parse_bound, render_export
+from .imports import import_items
+
+# Rows fetched and serialized per round trip when streaming a report
+STREAM_CHUNK_SIZE = 500
+
+# Suggestions returned by the autocomplete action by default and at most
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Identifiers resolved per IN query by the batch action
+BATCH_CHUNK_SIZE = 500
+
+# Periods the history action can total the daily change rollups by
+HISTORY_BUCKETS = ('day', 'week', 'month')
+
+
+def export_response(request, kind):
+    """
+    Stream an export of the user's items or changes as CSV or NDJSON.
+    
+    Query params: output=csv|ndjson, category=<id>, since/until=<ISO date or
+    datetime> (since inclusive, until exclusive) and gzip=true.
+    """
+    params = request.query_params
+    output_format = params.get('output', 'csv')
+    if output_format not in FORMATS:
+        return Response(
+            {'error': f"output must be one of: {', '.join(FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        since = parse_bound(params['since']) if params.get('since') else None
+        until = parse_bound(params['until']) if params.get('until') else None
+        category = int(params['category']) if params.get('category') else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    compress = params.get('gzip', '').lower() in ('1', 'true')
+    
+    header, rows = export_rows(kind, owner=request.user, category=category, since=since, until=until)
+    filename = f'inventory-{kind}.{output_format}'
+    if compress:
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        render_export(output_format, header, rows, compress=compress),
+        content_type='application/gzip' if compress else CONTENT_TYPES[output_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -19,7 +80,16 @@ class CategoryViewSet(viewsets.ModelViewSet):
     ordering = ['name']
     
     def get_queryset(self):
-        return Category.objects.filter(owner=self.request.user)
+        # Item counters are annotated here so listing categories doesn't cost a query per row
+        return Category.objects.filter(owner=self.request.user).annotate(
+            items_count=Count('items'),
+            low_stock_count=Count('items', filter=Q(items__quantity__lte=models.F('items__minimum_stock_level'))),
+            total_value=Coalesce(
+                Sum(models.F('items__quantity') * models.F('items__price')),
+                models.Value(0),
+                output_field=models.DecimalField(max_digits=16, decimal_places=2)
+            ),
+        )
 
 
 class InventoryItemViewSet(viewsets.ModelViewSet):
@@ -30,28 +100,80 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     filterset_fields = ['category', 'priority']
     
     def get_queryset(self):
-        return InventoryItem.objects.filter(owner=self.request.user).select_related('category')
+        queryset = InventoryItem.objects.filter(owner=self.request.user).select_related('category')
+        if self.includes_recent_changes():
+            # Top changes per item come from one windowed query instead of two per item
+            queryset = queryset.annotate(changes_count=Count('changes')).prefetch_related(
+                models.Prefetch(
+                    'changes',
+                    queryset=InventoryChange.objects.select_related('changed_by').order_by(
+                        '-timestamp', '-id'
+                    )[:InventoryItemDetailSerializer.RECENT_CHANGES_LIMIT],
+                    to_attr='prefetched_recent_changes'
+                )
+            )
+        return queryset
     
     def get_serializer_class(self):
-        if self.action == 'retrieve':
+        if self.includes_recent_changes():
             return InventoryItemDetailSerializer
         return InventoryItemSerializer
     
+    def includes_recent_changes(self):
+        if self.action == 'retrieve':
+            return True
+        if self.action == 'list':
+            expand = self.request.query_params.get('expand', '')
+            return 'recent_changes' in expand.split(',')
+        if self.action == 'batch':
+            return self.request.query_params.get('light', '').lower() not in ('1', 'true')
+        return False
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List items, answering conditional GETs with 304 when nothing changed.
+        
+        The ETag comes from one aggregate over the filtered items, so an
+        unchanged poll skips fetching and serializing the page. There is no
+        Last-Modified: deleting an item changes the count but not the newest
+        timestamp.
+        """
+        etag = self.list_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    
+    def list_etag(self):
+        queryset = self.filter_queryset(InventoryItem.objects.filter(owner=self.request.user))
+        state = queryset.aggregate(
+            count=Count('id'),
+            items_updated=Max('last_updated'),
+            categories_updated=Max('category__updated_at'),
+        )
+        # Category names are rendered in the list, so their edits change the representation too
+        timestamps = [value for value in (state['items_updated'], state['categories_updated']) if value]
+        fingerprint = '|'.join([
+            str(self.request.user.pk), self.request.get_full_path(), str(state['count']),
+            *(value.isoformat() for value in timestamps)
+        ])
+        return 'W/"%s"' % hashlib.md5(fingerprint.encode(), usedforsecurity=False).hexdigest()
+    
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """Get items with low stock levels"""
         low_stock_items = self.get_queryset().filter(
             quantity__lte=models.F('minimum_stock_level')
         )
-        serializer = self.get_serializer(low_stock_items, many=True)
-        return Response(serializer.data)
+        return self.stock_report(low_stock_items)
     
     @action(detail=False, methods=['get'])
     def out_of_stock(self, request):
         """Get items that are out of stock"""
         out_of_stock_items = self.get_queryset().filter(quantity=0)
-        serializer = self.get_serializer(out_of_stock_items, many=True)
-        return Response(serializer.data)
+        return self.stock_report(out_of_stock_items)
     
     @action(detail=False, methods=['get'])
     def overstocked(self, request):
@@ -59,40 +181,242 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         overstocked_items = self.get_queryset().filter(
             quantity__gte=models.F('maximum_stock_level')
         )
-        serializer = self.get_serializer(overstocked_items, many=True)
-        return Response(serializer.data)
+        return self.stock_report(overstocked_items)
     
-    @action(detail=False, methods=['get'])
-    def summary(self, request):
-        """Get inventory summary statistics"""
-        queryset = self.get_queryset()
+    def stock_report(self, queryset):
+        """
+        Paginate a stock report like the main list.
         
-        total_items = queryset.count()
-        total_value = queryset.aggregate(
-            total=Sum(models.F('quantity') * models.F('price'))
-        )['total'] or 0
+        With ?stream=true the whole report is streamed as one JSON array
+        instead, serialized chunk by chunk off a server-side cursor.
+        """
+        queryset = self.filter_queryset(queryset)
+        if self.request.query_params.get('stream', '').lower() in ('1', 'true'):
+            return StreamingHttpResponse(self.stream_json(queryset), content_type='application/json')
         
-        low_stock_count = queryset.filter(
-            quantity__lte=models.F('minimum_stock_level')
-        ).count()
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    def stream_json(self, queryset):
+        encoder = JSONEncoder()
+        rows = queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)
+        separator = ''
+        yield '['
+        while batch := list(islice(rows, STREAM_CHUNK_SIZE)):
+            data = self.get_serializer(batch, many=True).data
+            yield separator + ','.join(encoder.encode(row) for row in data)
+            separator = ','
+        yield ']'
+    
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_csv(self, request):
+        """
+        Bulk create or update items from an uploaded CSV file.
         
-        out_of_stock_count = queryset.filter(quantity=0).count()
+        Send the file as multipart field "file". Set create_categories=false to
+        reject unknown category names, record_changes=true to log the stock changes.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Please upload a CSV file as "file"'}, status=status.HTTP_400_BAD_REQUEST)
         
-        overstocked_count = queryset.filter(
-            quantity__gte=models.F('maximum_stock_level')
-        ).count()
+        lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = import_items(
+                request.user,
+                lines,
+                create_categories=request.data.get('create_categories', 'true').lower() != 'false',
+                record_changes=request.data.get('record_changes', '').lower() == 'true'
+            )
+        except UnicodeDecodeError:
+            return Response({'error': 'File must be UTF-8 encoded'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all of the user's inventory items as CSV or NDJSON"""
+        return export_response(request, 'items')
+    
+    @action(detail=False, methods=['get', 'post'])
+    def batch(self, request):
+        """
+        Retrieve many items at once by ?ids=1,2,3 (or ?skus=...), or by POSTing
+        {"ids": [...]} or {"skus": [...]}.
+        
+        Results are keyed by the requested identifier, with null and an entry
+        in not_found for unknown ones. Items use the detail representation
+        unless ?light=true asks for the list one.
+        """
+        if request.method == 'GET':
+            data = {
+                key: request.query_params[key].split(',')
+                for key in ('ids', 'skus') if request.query_params.get(key)
+            }
+        else:
+            data = request.data
+        serializer = BatchRetrieveSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        categories_count = Category.objects.filter(owner=request.user).count()
+        field = 'id' if serializer.validated_data.get('ids') else 'sku'
+        identifiers = list(dict.fromkeys(serializer.validated_data[field + 's']))
+        queryset = self.get_queryset().order_by()
+        found = {}
+        for start in range(0, len(identifiers), BATCH_CHUNK_SIZE):
+            items = list(queryset.filter(**{f'{field}__in': identifiers[start:start + BATCH_CHUNK_SIZE]}))
+            for item, item_data in zip(items, self.get_serializer(items, many=True).data):
+                found[getattr(item, field)] = item_data
         
         return Response({
-            'total_items': total_items,
-            'total_value': total_value,
-            'low_stock_count': low_stock_count,
-            'out_of_stock_count': out_of_stock_count,
-            'overstocked_count': overstocked_count,
-            'categories_count': categories_count,
+            'results': {str(identifier): found.get(identifier) for identifier in identifiers},
+            'not_found': [identifier for identifier in identifiers if identifier not in found],
         })
     
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Suggest items whose SKU or name starts with ?q= (case-insensitive).
+        
+        Returns up to ?limit= (default 10, max 50) compact {id, sku, name}
+        rows, SKU matches first. Each lookup is a range scan on an
+        (owner, lower(column)) index rather than a search over every item.
+        """
+        prefix = request.query_params.get('q', '').strip().lower()
+        if not prefix:
+            return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT)), 1), AUTOCOMPLETE_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        suggestions = {}
+        for column in ('sku', 'name'):
+            rows = (
+                InventoryItem.objects.filter(owner=request.user)
+                .alias(key=Lower(column))
+                .filter(key__gte=prefix, key__lt=prefix + '\uffff')
+                .order_by('key')
+                .values('id', 'sku', 'name')[:limit]
+            )
+            for row in rows:
+                suggestions.setdefault(row['id'], row)
+            if len(suggestions) >= limit:
+                break
+        return Response(list(suggestions.values())[:limit])
+    
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Get inventory summary statistics.
+        
+        Served from the owner's InventoryStats rows when possible; pass
+        ?breakdown=category,priority to include the per-group rows.
+        """
+        breakdown = {
+            part.strip() for part in request.query_params.get('breakdown', '').split(',') if part.strip()
+        }
+        unknown = breakdown - {'category', 'priority'}
+        if unknown:
+            return Response(
+                {'error': f"Unknown breakdown: {', '.join(sorted(unknown))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Per-priority counters are not materialized, so those need the items
+        summary = None
+        if 'priority' not in breakdown:
+            summary = self._summary_from_stats(request, breakdown)
+        if summary is None:
+            summary = self._summary_from_items(request, breakdown)
+        return Response(summary)
+    
+    def _summary_from_stats(self, request, breakdown):
+        rows = InventoryStats.objects.filter(owner=request.user)
+        if 'category' in breakdown:
+            rows = rows.select_related('category')
+        else:
+            rows = rows.filter(category__isnull=True)
+        rows = list(rows)
+        
+        totals = next((row for row in rows if row.category_id is None), None)
+        if totals is None:
+            return None
+        
+        summary = {
+            'total_items': totals.item_count,
+            'total_value': totals.total_value,
+            'low_stock_count': totals.low_stock_count,
+            'out_of_stock_count': totals.out_of_stock_count,
+            'overstocked_count': totals.overstocked_count,
+            'categories_count': totals.categories_count,
+        }
+        if 'category' in breakdown:
+            summary['by_category'] = [
+                {
+                    'category': row.category_id,
+                    'category_name': row.category.name,
+                    'total_items': row.item_count,
+                    'total_value': row.total_value,
+                    'low_stock_count': row.low_stock_count,
+                    'out_of_stock_count': row.out_of_stock_count,
+                    'overstocked_count': row.overstocked_count,
+                }
+                for row in sorted(rows, key=lambda row: row.category_id or 0)
+                if row.category_id is not None and row.item_count
+            ]
+        return summary
+    
+    def _summary_from_items(self, request, breakdown):
+        """Compute the summary with one GROUP BY query over the owner's items"""
+        categories_count = Category.objects.filter(owner=request.user).values('owner').annotate(
+            count=Count('id')
+        ).values('count')
+        groups = list(
+            self.get_queryset()
+            .order_by()
+            .values('category_id', 'category__name', 'priority')
+            .annotate(
+                total_items=Count('id'),
+                total_value=Sum(models.F('quantity') * models.F('price')),
+                low_stock_count=Count('id', filter=Q(quantity__lte=models.F('minimum_stock_level'))),
+                out_of_stock_count=Count('id', filter=Q(quantity=0)),
+                overstocked_count=Count('id', filter=Q(quantity__gte=models.F('maximum_stock_level'))),
+                categories_count=models.Subquery(categories_count),
+            )
+        )
+        
+        counters = ('total_items', 'total_value', 'low_stock_count', 'out_of_stock_count', 'overstocked_count')
+        totals = dict.fromkeys(counters, 0)
+        by_category = {}
+        by_priority = {}
+        for group in groups:
+            category = by_category.setdefault(group['category_id'], {
+                'category': group['category_id'],
+                'category_name': group['category__name'],
+                **dict.fromkeys(counters, 0),
+            })
+            priority = by_priority.setdefault(group['priority'], {
+                'priority': group['priority'],
+                **dict.fromkeys(counters, 0),
+            })
+            for counter in counters:
+                value = group[counter] or 0
+                totals[counter] += value
+                category[counter] += value
+                priority[counter] += value
+        
+        if groups:
+            totals['categories_count'] = groups[0]['categories_count'] or 0
+        else:
+            totals['categories_count'] = Category.objects.filter(owner=request.user).count()
+        
+        if 'category' in breakdown:
+            totals['by_category'] = list(by_category.values())
+        if 'priority' in breakdown:
+            totals['by_priority'] = list(by_priority.values())
+        return totals
+    
     @action(detail=True, methods=['post'])
     def adjust_quantity(self, request, pk=None):
         """Adjust the quantity of an inventory item"""
@@ -105,31 +429,27 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
             reason = serializer.validated_data.get('reason', '')
             notes = serializer.validated_data.get('notes', '')
             
-            previous_quantity = item.quantity
-            new_quantity = previous_quantity + quantity_change
-            
-            if new_quantity < 0:
-                return Response(
-                    {'error': 'Insufficient stock for this operation'},
-                    status=status.HTTP_400_BAD_REQUEST
+            with transaction.atomic():
+                new_quantity = item.apply_quantity_change(quantity_change)
+                if new_quantity is None:
+                    return Response(
+                        {'error': 'Insufficient stock for this operation'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                previous_quantity = new_quantity - quantity_change
+                
+                # Create inventory change record
+                InventoryChange.objects.create(
+                    inventory_item=item,
+                    change_type=change_type,
+                    quantity_changed=quantity_change,
+                    previous_quantity=previous_quantity,
+                    new_quantity=new_quantity,
+                    reason=reason,
+                    notes=notes,
+                    changed_by=request.user
                 )
             
-            # Update item quantity
-            item.quantity = new_quantity
-            item.save()
-            
-            # Create inventory change record
-            InventoryChange.objects.create(
-                inventory_item=item,
-                change_type=change_type,
-                quantity_changed=quantity_change,
-                previous_quantity=previous_quantity,
-                new_quantity=new_quantity,
-                reason=reason,
-                notes=notes,
-                changed_by=request.user
-            )
-            
             return Response({
                 'message': 'Quantity adjusted successfully',
                 'previous_quantity': previous_quantity,
@@ -138,18 +458,168 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """
+        Net quantity change per period for one item, read from the daily
+        InventoryChangeDaily totals rather than the raw change log.
+        
+        Query params: from/to=<ISO date> (both inclusive, optional) and
+        bucket=day|week|month (default day). Only periods with changes are
+        listed, each with its totals per change type.
+        """
+        item = self.get_object()
+        params = request.query_params
+        bucket = params.get('bucket', 'day')
+        if bucket not in HISTORY_BUCKETS:
+            return Response(
+                {'error': f"bucket must be one of: {', '.join(HISTORY_BUCKETS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        bounds = {}
+        for name in ('from', 'to'):
+            if not params.get(name):
+                continue
+            try:
+                bounds[name] = parse_date(params[name])
+            except ValueError:
+                bounds[name] = None
+            if bounds[name] is None:
+                return Response({'error': f'Invalid date: {params[name]}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows = InventoryChangeDaily.objects.filter(inventory_item=item)
+        if 'from' in bounds:
+            rows = rows.filter(day__gte=bounds['from'])
+        if 'to' in bounds:
+            rows = rows.filter(day__lte=bounds['to'])
+        rows = rows.annotate(
+            period=Trunc('day', bucket, output_field=models.DateField())
+        ).values('period', 'change_type').annotate(
+            quantity=Sum('sum_qty'), changes=Sum('count')
+        ).order_by('period', 'change_type')
+        
+        periods = {}
+        for row in rows:
+            period = periods.setdefault(row['period'], {
+                'period': row['period'], 'net_change': 0, 'changes': 0, 'by_type': {}
+            })
+            period['net_change'] += row['quantity']
+            period['changes'] += row['changes']
+            period['by_type'][row['change_type']] = {'quantity': row['quantity'], 'changes': row['changes']}
+        return Response({
+            'item': item.pk,
+            'bucket': bucket,
+            'from': bounds.get('from'),
+            'to': bounds.get('to'),
+            'results': list(periods.values()),
+        })
+    
+    @action(detail=False, methods=['post'])
+    def bulk_adjust(self, request):
+        """Adjust the quantities of many inventory items in one transaction"""
+        data = request.data if isinstance(request.data, dict) else {'adjustments': request.data}
+        serializer = BulkQuantityAdjustmentSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        entries = serializer.validated_data['adjustments']
+        ids = {entry['id'] for entry in entries if 'id' in entry}
+        skus = {entry['sku'] for entry in entries if 'id' not in entry}
+        
+        with transaction.atomic():
+            # Lock every referenced item up front with a single query
+            items = list(
+                InventoryItem.objects
+                .filter(owner=request.user)
+                .filter(Q(id__in=ids) | Q(sku__in=skus))
+                .select_for_update()
+                .only(
+                    'id', 'sku', 'quantity', 'price', 'minimum_stock_level', 'maximum_stock_level',
+                    'owner', 'category', 'last_updated'
+                )
+            )
+            items_by_id = {item.id: item for item in items}
+            items_by_sku = {item.sku: item for item in items}
+            
+            results = []
+            changes = []
+            touched = {}
+            for index, entry in enumerate(entries):
+                if 'id' in entry:
+                    item = items_by_id.get(entry['id'])
+                    reference = {'id': entry['id']}
+                else:
+                    item = items_by_sku.get(entry['sku'])
+                    reference = {'sku': entry['sku']}
+                
+                if item is None:
+                    results.append({'index': index, **reference, 'status': 'not_found'})
+                    continue
+                
+                quantity_change = entry['quantity_change']
+                previous_quantity = item.quantity
+                new_quantity = previous_quantity + quantity_change
+                
+                if new_quantity < 0:
+                    results.append({
+                        'index': index, **reference, 'status': 'insufficient_stock',
+                        'quantity': previous_quantity
+                    })
+                    continue
+                
+                # Entries for the same item are applied in order against the running total
+                if item.id not in touched:
+                    touched[item.id] = (item, item.stats_state())
+                item.quantity = new_quantity
+                changes.append(InventoryChange(
+                    inventory_item=item,
+                    owner_id=item.owner_id,
+                    change_type=entry['change_type'],
+                    quantity_changed=quantity_change,
+                    previous_quantity=previous_quantity,
+                    new_quantity=new_quantity,
+                    reason=entry.get('reason', ''),
+                    notes=entry.get('notes', ''),
+                    changed_by=request.user
+                ))
+                results.append({
+                    'index': index, **reference, 'status': 'applied',
+                    'previous_quantity': previous_quantity,
+                    'new_quantity': new_quantity,
+                    'quantity_changed': quantity_change
+                })
+            
+            if touched:
+                now = timezone.now()
+                for item, _ in touched.values():
+                    item.last_updated = now
+                InventoryItem.objects.bulk_update(
+                    [item for item, _ in touched.values()], ['quantity', 'last_updated']
+                )
+                InventoryChange.objects.bulk_create(changes)
+                InventoryChangeDaily.record(changes)
+                InventoryStats.record_changes(
+                    (before, item.stats_state()) for item, before in touched.values()
+                )
+        
+        return Response({
+            'applied': len(changes),
+            'failed': len(results) - len(changes),
+            'results': results
+        })
 
 
-class InventoryChangeViewSet(viewsets.ReadOnlyModelViewSet):
+class InventoryChangeViewSet(OptInPageNumberMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = InventoryChangeSerializer
     permission_classes = [IsAuthenticated]
     ordering_fields = ['timestamp', 'change_type']
-    ordering = ['-timestamp']
+    ordering = ['-timestamp', '-id']
     filterset_fields = ['change_type', 'inventory_item']
     
     def get_queryset(self):
         return InventoryChange.objects.filter(
-            inventory_item__owner=self.request.user
+            owner=self.request.user
         ).select_related('inventory_item', 'changed_by')
     
     @action(detail=False, methods=['get'])
@@ -159,6 +629,11 @@ class InventoryChangeViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(recent_changes, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the user's full change history as CSV or NDJSON"""
+        return export_response(request, 'changes')
+    
     @action(detail=False, methods=['get'])
     def by_type(self, request):
         """Get inventory changes grouped by type"""
@@ -169,6 +644,7 @@ class InventoryChangeViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        changes = self.get_queryset().filter(change_type=change_type)
-        serializer = self.get_serializer(changes, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        changes = self.filter_queryset(self.get_queryset().filter(change_type=change_type))
+        page = self.paginate_queryset(changes)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
\ No newline at end of file
@@ -73,6 +73,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than the shared-cache in-memory default, so tests running requests from
+        # several threads wait for each other's write locks instead of failing with "table is locked"
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -124,7 +129,7 @@ AUTH_USER_MODEL = 'users.CustomUser'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'users.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -132,7 +137,23 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
-        'rest_framework.filters.SearchFilter',
-        'rest_framework.filters.OrderingFilter',
+        'inventory.search.FullTextSearchFilter',
+        'inventory.search.RankedOrderingFilter',
     ],
-}
\ No newline at end of file
+}
+
+# Cache of token key -> user used by CachedTokenAuthentication.
+# With BACKEND None every worker process keeps its own LRU, and a logout or deactivation
+# only clears the entry in the process that handled it: other workers keep accepting the
+# token for up to TTL seconds. When running more than one worker, set BACKEND to a CACHES
+# alias all of them share (Redis, Memcached or the database cache, not LocMemCache) so
+# invalidations reach every process.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 1024,
+    'TTL': 60,
+    'BACKEND': None,
+}
+
+# Serve ?search= on inventory items (and the admin search box) from the FTS5 / tsvector
+# index instead of LIKE scans. Set to False to fall back to plain SearchFilter matching.
+INVENTORY_FULL_TEXT_SEARCH = True
\ No newline at end of file
@@ -0,0 +1,102 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+DEFAULTS = {
+    'MAX_SIZE': 1024,
+    # Seconds a cached token stays valid; keeps other processes' copies short-lived
+    'TTL': 60,
+    # Django cache alias to share entries between processes, or None for per-process only,
+    # in which case other processes see a logout only once their copy expires after TTL
+    'BACKEND': None,
+}
+
+
+def get_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+class TokenUserCache:
+    """Token key -> user, in a per-process LRU or a shared Django cache"""
+    
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token_key):
+        return 'token-auth:' + hashlib.sha256(token_key.encode('utf-8')).hexdigest()
+    
+    def get(self, token_key):
+        options = get_cache_settings()
+        key = self._key(token_key)
+        if options['BACKEND']:
+            return caches[options['BACKEND']].get(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    def set(self, token_key, user):
+        options = get_cache_settings()
+        key = self._key(token_key)
+        if options['BACKEND']:
+            caches[options['BACKEND']].set(key, user, options['TTL'])
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + options['TTL'], user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > options['MAX_SIZE']:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, token_key):
+        options = get_cache_settings()
+        key = self._key(token_key)
+        if options['BACKEND']:
+            caches[options['BACKEND']].delete(key)
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_user_cache = TokenUserCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the Token + user query for recently seen keys.
+    
+    Entries are dropped when the token is deleted (logout), whenever the user
+    is saved and when a queryset update() changes is_active. Without a shared
+    BACKEND that only reaches the current process; see TOKEN_AUTH_CACHE in settings.
+    """
+    
+    def authenticate_credentials(self, key):
+        user = token_user_cache.get(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_user_cache.set(key, user)
+            return (user, token)
+        # Re-checked as TokenAuthentication does on a miss
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        # Hand each request its own copy so per-request changes don't leak between threads
+        user = copy.copy(user)
+        return (user, Token(key=key, user=user))
@@ -1,7 +1,25 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
 
+class CustomUserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        # update() sends no post_save, so drop the cached tokens of users whose is_active changes here
+        if 'is_active' not in kwargs:
+            return super().update(**kwargs)
+        from rest_framework.authtoken.models import Token
+        from .authentication import token_user_cache
+        keys = list(Token.objects.filter(user__in=self).values_list('key', flat=True))
+        rows = super().update(**kwargs)
+        for key in keys:
+            token_user_cache.invalidate(key)
+        return rows
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    pass
+
+
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     first_name = models.CharField(max_length=150, blank=True)
@@ -10,6 +28,8 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
     
+    objects = CustomUserManager()
+    
     def __str__(self):
         return self.username
     
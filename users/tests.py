@@ -0,0 +1,75 @@
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from .authentication import token_user_cache
+from .models import CustomUser
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        token_user_cache.clear()
+        self.addCleanup(token_user_cache.clear)
+        self.user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='secret')
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+    
+    def test_repeated_request_is_served_from_the_cache(self):
+        url = reverse('profile')
+        # The Token + user lookup
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'owner')
+    
+    def test_logout_invalidates_the_cached_token(self):
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 200)
+        
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+    
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        
+        self.user.is_active = False
+        self.user.save()
+        
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+    
+    def test_user_deactivated_by_queryset_update_is_rejected(self):
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        
+        # No post_save is sent for this
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        
+        response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(str(response.data['detail']), 'User inactive or deleted.')
+    
+    def test_cached_inactive_user_is_rejected(self):
+        # Only the re-check on the cache hit stands between this entry and the view
+        self.user.is_active = False
+        token_user_cache.set(self.token.key, self.user)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(str(response.data['detail']), 'User inactive or deleted.')
+    
+    @override_settings(TOKEN_AUTH_CACHE={'BACKEND': 'default'})
+    def test_shared_backend_is_invalidated_on_logout(self):
+        self.addCleanup(cache.clear)
+        url = reverse('profile')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 200)
+        
+        self.assertEqual(self.client.get(url).status_code, 401)